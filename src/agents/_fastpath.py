@@ -0,0 +1,33 @@
+"""Optional Numba-compiled kernels with NumPy fallbacks."""
+from typing import Tuple
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - optional accelerator
+    njit = None
+
+HAS_NUMBA = njit is not None
+
+
+if HAS_NUMBA:
+    # cache=True keeps the compiled kernel on disk across runs
+    @njit(cache=True)
+    def _rank_segments_jit(values):
+        lo = 0
+        hi = 0
+        for i in range(1, values.shape[0]):
+            v = values[i]
+            if v < values[lo]:
+                lo = i
+            elif v > values[hi]:
+                hi = i
+        return lo, hi
+
+
+def rank_segments(values: np.ndarray) -> Tuple[int, int]:
+    """Indices of the (lowest, highest) value; ties keep the first occurrence."""
+    if HAS_NUMBA:
+        lo, hi = _rank_segments_jit(values)
+        return int(lo), int(hi)
+    return int(values.argmin()), int(values.argmax())
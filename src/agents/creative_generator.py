@@ -1,9 +1,84 @@
 """Creative Generator Agent - Generates new creative recommendations."""
 import pandas as pd
-from typing import Dict, Any, List
-from collections import Counter
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
 import re
+import heapq
 from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from utils.data_utils import filter_date_range, get_parsed_time_period
+from utils.prompt_loader import load_prompt
+
+try:
+    import hyperscan
+except ImportError:  # Optional: fall back to per-pattern str.contains scans
+    hyperscan = None
+
+
+# Messaging themes and the phrases that signal them
+THEME_PATTERNS = {
+    "Urgency": r"limited|deal ends|tonight|last chance|now",
+    "Value": r"comfort|quality|premium|soft|breathable",
+    "Social Proof": r"best-selling|rated|review|popular",
+    "Guarantee": r"guarantee|free returns|risk-free",
+    "Discount": r"\d+%\s*off|save|discount"
+}
+
+CTA_PATTERNS = [
+    "shop now", "try", "buy", "get", "upgrade", "discover",
+    "limited offer", "deal", "save"
+]
+
+
+# Creative variations proposed for every segment. C1's inspiration_from_data
+# and C2's rationale are filled in from the data at generation time.
+_CREATIVE_TEMPLATES = (
+    # Creative 1: Urgency + Value
+    {
+        "creative_id": "C1",
+        "format": "Image",
+        "headline": "Last Chance: Premium Comfort at 30% Off",
+        "message": "Ultra-soft bamboo fabric that moves with you. Limited stock on best-selling men's briefs. Upgrade your comfort today.",
+        "cta": "Shop Now - 30% Off",
+        "messaging_angle": "Urgency + Value",
+        "rationale": "Combines urgency with value proposition. High-performing pattern from data.",
+        "inspiration_from_data": None
+    },
+    # Creative 2: Social Proof
+    {
+        "creative_id": "C2",
+        "format": "Video",
+        "headline": "10,000+ Men Switched. Here's Why.",
+        "message": "See why our breathable mesh boxers are rated 4.9/5. No ride-up guarantee. Free returns.",
+        "cta": "Watch & Shop",
+        "messaging_angle": "Social proof + Risk reversal",
+        "rationale": None,
+        "inspiration_from_data": "Video creative_type has highest CTR"
+    },
+    # Creative 3: UGC
+    {
+        "creative_id": "C3",
+        "format": "UGC",
+        "headline": "Finally, Underwear That Actually Fits",
+        "message": "Real customer: 'Most comfortable briefs I've owned. The cooling mesh is a game-changer.' - Mike, verified buyer",
+        "cta": "Read Reviews & Shop",
+        "messaging_angle": "Authenticity + Specific benefit",
+        "rationale": "UGC format builds credibility. Specific benefits resonate.",
+        "inspiration_from_data": "Cooling mesh and comfort are recurring themes"
+    },
+    # Creative 4: Bundle offer
+    {
+        "creative_id": "C4",
+        "format": "Carousel",
+        "headline": "3-Pack Bundle: Save 40% + Free Shipping",
+        "message": "Mix & match: Briefs, Boxers, Trunks. Premium organic cotton. Best value of the year.",
+        "cta": "Build Your Bundle",
+        "messaging_angle": "Value + Choice",
+        "rationale": "Bundle offers increase AOV. Carousel showcases variety.",
+        "inspiration_from_data": "3-pack messaging has high engagement"
+    }
+)
 
 
 class CreativeGeneratorAgent:
@@ -13,34 +88,57 @@ class CreativeGeneratorAgent:
         self.config = config
         self.low_ctr_threshold = config['analysis']['low_ctr_threshold']
         self.prompt_template = self._load_prompt()
+        
+        # Regex sources for the vectorized str.contains scans. Kept as strings
+        # so Arrow-backed message columns can run them in Arrow's regex kernel.
+        self._theme_patterns = dict(THEME_PATTERNS)
+        self._cta_patterns = {cta: re.escape(cta) for cta in CTA_PATTERNS}
+        
+        # With hyperscan, all theme + CTA patterns share one automaton
+        self._pattern_db = self._build_pattern_db() if hyperscan is not None else None
+    
+    def _build_pattern_db(self):
+        """Compile theme patterns (ids first) and CTA patterns into one hyperscan database."""
+        expressions = [pattern.encode('utf-8') for pattern in THEME_PATTERNS.values()]
+        expressions += [re.escape(cta).encode('utf-8') for cta in CTA_PATTERNS]
+        
+        db = hyperscan.Database()
+        db.compile(
+            expressions=expressions,
+            ids=list(range(len(expressions))),
+            elements=len(expressions),
+            # SINGLEMATCH: each pattern reports at most once per message
+            flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(expressions)
+        )
+        return db
     
     def _load_prompt(self) -> str:
         """Load prompt template."""
-        prompt_path = Path("prompts/creative_generator_prompt.md")
-        if prompt_path.exists():
-            return prompt_path.read_text(encoding='utf-8')
-        return ""
+        return load_prompt("prompts/creative_generator_prompt.md")
     
     def generate_recommendations(self, validated_hypotheses: Dict[str, Any],
-                                df: pd.DataFrame, plan: Dict[str, Any]) -> Dict[str, Any]:
+                                df: pd.DataFrame, plan: Dict[str, Any],
+                                current_df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
         """Generate creative recommendations."""
-        # Get time period
-        time_period = plan['time_period']
-        current_start = pd.to_datetime(time_period['start_date'])
-        current_end = pd.to_datetime(time_period['end_date'])
+        # Get time period (skip filtering when the caller already has it)
+        if current_df is None:
+            periods = get_parsed_time_period(plan)
+            current_df = filter_date_range(df, periods['current_start'], periods['current_end'])
         
-        current_df = df[(df['date'] >= current_start) & (df['date'] <= current_end)].copy()
+        # Aggregate by creative_type once; shared by pattern analysis and low-performer detection
+        creative_agg = self._aggregate_by_creative_type(current_df)
         
         # Analyze creative patterns
-        creative_analysis = self._analyze_creative_patterns(current_df)
+        creative_analysis = self._analyze_creative_patterns(current_df, creative_agg)
         
         # Identify low-performing segments
-        low_performers = self._identify_low_performers(current_df)
+        low_performers = self._identify_low_performers(current_df, creative_agg)
         
         # Generate recommendations
         recommendations = []
         
-        for segment_info in low_performers[:3]:  # Top 3 segments needing help
+        # Top 3 segments needing help (lowest CTR first)
+        for segment_info in heapq.nsmallest(3, low_performers, key=lambda x: x['ctr']):
             recs = self._generate_segment_recommendations(
                 segment_info, creative_analysis, current_df
             )
@@ -76,24 +174,33 @@ class CreativeGeneratorAgent:
         
         return result
     
-    def _analyze_creative_patterns(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _aggregate_by_creative_type(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Aggregate CTR, ROAS, spend and campaign per creative_type in one pass."""
+        return df.groupby('creative_type', sort=False, observed=True).agg(
+            ctr=('ctr', 'mean'),
+            roas=('roas', 'mean'),
+            spend=('spend', 'sum'),
+            campaign_name=('campaign_name', 'first')
+        )
+    
+    def _analyze_creative_patterns(self, df: pd.DataFrame,
+                                   creative_agg: pd.DataFrame) -> Dict[str, Any]:
         """Analyze high-performing creative patterns."""
         # Find best performing creative type
-        creative_performance = df.groupby('creative_type').agg({
-            'ctr': 'mean',
-            'roas': 'mean',
-            'spend': 'sum'
-        }).round(4)
+        creative_performance = creative_agg[['ctr', 'roas', 'spend']].round(4).sort_index()
         
-        best_creative = creative_performance['ctr'].idxmax()
-        best_ctr = creative_performance.loc[best_creative, 'ctr']
+        ctr_series = creative_performance['ctr']
+        best_pos = int(np.nanargmax(ctr_series.to_numpy()))
+        best_creative = ctr_series.index[best_pos]
+        best_ctr = ctr_series.iat[best_pos]
         
         # Extract messaging themes from high-performing ads
-        high_performers = df[df['ctr'] > df['ctr'].quantile(0.75)]
-        messages = high_performers['creative_message'].dropna().tolist()
+        # Only the message column is needed, so mask it directly
+        ctr_values = df['ctr'].to_numpy()
+        high_mask = ctr_values > self._select_quantile(ctr_values, 0.75)
+        messages = df['creative_message'][high_mask].dropna()
         
-        themes = self._extract_themes(messages)
-        ctas = self._extract_ctas(messages)
+        themes, ctas = self._extract_themes_and_ctas(messages)
         
         return {
             "best_creative_type": str(best_creative),
@@ -102,83 +209,116 @@ class CreativeGeneratorAgent:
             "top_ctas": ctas[:5]
         }
     
-    def _extract_themes(self, messages: List[str]) -> List[str]:
-        """Extract common themes from messages."""
-        themes = []
+    def _select_quantile(self, values: np.ndarray, q: float) -> float:
+        """Linearly interpolated quantile via partial selection, ignoring NaN."""
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return np.nan
         
-        # Common patterns
-        patterns = {
-            "Urgency": r"(limited|deal ends|tonight|last chance|now)",
-            "Value": r"(comfort|quality|premium|soft|breathable)",
-            "Social Proof": r"(best-selling|rated|review|popular)",
-            "Guarantee": r"(guarantee|free returns|risk-free)",
-            "Discount": r"(\d+%\s*off|save|discount)"
-        }
+        # Only the two neighbouring order statistics are needed, so select
+        # them with introselect instead of ordering the whole array
+        h = (values.size - 1) * q
+        lo = int(h)
+        hi = min(lo + 1, values.size - 1)
+        selected = np.partition(values, [lo, hi])
+        return selected[lo] + (selected[hi] - selected[lo]) * (h - lo)
+    
+    def _extract_themes_and_ctas(self, messages: pd.Series) -> Tuple[List[str], List[str]]:
+        """Extract themes and CTAs, in one scan per message when hyperscan is available."""
+        if self._pattern_db is None:
+            return self._extract_themes(messages), self._extract_ctas(messages)
+        
+        counts = [0] * (len(THEME_PATTERNS) + len(CTA_PATTERNS))
+        first_seen = [None] * len(counts)
+        position = 0
         
-        theme_counts = Counter()
-        for message in messages:
-            message_lower = message.lower()
-            for theme, pattern in patterns.items():
-                if re.search(pattern, message_lower):
-                    theme_counts[theme] += 1
+        def on_match(pattern_id, start, end, flags, context):
+            counts[pattern_id] += 1
+            if first_seen[pattern_id] is None:
+                first_seen[pattern_id] = position
         
-        return [theme for theme, _ in theme_counts.most_common(5)]
+        # Per-call scratch space keeps concurrent scans thread-safe
+        scratch = hyperscan.Scratch(self._pattern_db)
+        for position, message in enumerate(messages):
+            self._pattern_db.scan(str(message).encode('utf-8'),
+                                  match_event_handler=on_match, scratch=scratch)
+        
+        matches = list(zip(counts, first_seen))
+        n_themes = len(THEME_PATTERNS)
+        theme_counts = dict(zip(THEME_PATTERNS, matches[:n_themes]))
+        cta_counts = dict(zip(CTA_PATTERNS, matches[n_themes:]))
+        return (self._rank_counts(theme_counts),
+                [cta.title() for cta in self._rank_counts(cta_counts)])
+    
+    def _extract_themes(self, messages: pd.Series) -> List[str]:
+        """Extract common themes from messages."""
+        return self._rank_counts(self._count_matches(messages, self._theme_patterns))
     
-    def _extract_ctas(self, messages: List[str]) -> List[str]:
+    def _extract_ctas(self, messages: pd.Series) -> List[str]:
         """Extract CTAs from messages."""
-        cta_patterns = [
-            "shop now", "try", "buy", "get", "upgrade", "discover",
-            "limited offer", "deal", "save"
-        ]
+        return [cta.title() for cta in self._rank_counts(self._count_matches(messages, self._cta_patterns))]
+    
+    def _count_matches(self, messages: pd.Series,
+                       patterns: Dict[str, str]) -> Dict[str, Tuple[int, Optional[int]]]:
+        """Count the messages each pattern matches (case-insensitive), with the first match's position."""
+        if messages.empty:
+            return {}
         
-        cta_counts = Counter()
-        for message in messages:
-            message_lower = message.lower()
-            for cta in cta_patterns:
-                if cta in message_lower:
-                    cta_counts[cta] += 1
+        matches = {}
+        for name, pattern in patterns.items():
+            hits = messages.str.contains(pattern, case=False, regex=True, na=False).to_numpy(dtype=bool)
+            count = int(hits.sum())
+            matches[name] = (count, int(hits.argmax()) if count else None)
+        return matches
+    
+    def _rank_counts(self, matches: Dict[str, Tuple[int, Optional[int]]]) -> List[str]:
+        """Rank matched pattern names by count.
         
-        return [cta.title() for cta, _ in cta_counts.most_common(5)]
+        Ties go to the pattern seen in the earliest message, then declaration
+        order - the order a Counter filled message by message would give.
+        """
+        ranked = (
+            (-count, first, i, name)
+            for i, (name, (count, first)) in enumerate(matches.items()) if count > 0
+        )
+        return [name for _, _, _, name in heapq.nsmallest(5, ranked)]
     
-    def _identify_low_performers(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
-        """Identify segments needing creative refresh."""
+    def _identify_low_performers(self, df: pd.DataFrame,
+                                 creative_agg: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Identify segments needing creative refresh (in discovery order)."""
         low_performers = []
         
         # By creative_type
-        creative_perf = df.groupby('creative_type').agg({
-            'ctr': 'mean',
-            'roas': 'mean',
-            'campaign_name': 'first'
-        }).reset_index()
+        creative_perf = creative_agg.reset_index()
+        creative_perf = creative_perf[creative_perf['ctr'] < self.low_ctr_threshold]
         
         for _, row in creative_perf.iterrows():
-            if row['ctr'] < self.low_ctr_threshold:
-                low_performers.append({
-                    "segment_type": "creative_type",
-                    "segment_value": row['creative_type'],
-                    "campaign": row['campaign_name'],
-                    "ctr": row['ctr'],
-                    "roas": row['roas']
-                })
+            low_performers.append({
+                "segment_type": "creative_type",
+                "segment_value": row['creative_type'],
+                "campaign": row['campaign_name'],
+                "ctr": row['ctr'],
+                "roas": row['roas']
+            })
         
-        # By platform
-        platform_perf = df.groupby('platform').agg({
+        # By platform (always scanned: the total count is reported in the summary)
+        platform_perf = df.groupby('platform', sort=False, observed=True).agg({
             'ctr': 'mean',
             'roas': 'mean',
             'campaign_name': 'first'
         }).reset_index()
+        platform_perf = platform_perf[platform_perf['ctr'] < self.low_ctr_threshold]
         
         for _, row in platform_perf.iterrows():
-            if row['ctr'] < self.low_ctr_threshold:
-                low_performers.append({
-                    "segment_type": "platform",
-                    "segment_value": row['platform'],
-                    "campaign": row['campaign_name'],
-                    "ctr": row['ctr'],
-                    "roas": row['roas']
-                })
+            low_performers.append({
+                "segment_type": "platform",
+                "segment_value": row['platform'],
+                "campaign": row['campaign_name'],
+                "ctr": row['ctr'],
+                "roas": row['roas']
+            })
         
-        return sorted(low_performers, key=lambda x: x['ctr'])
+        return low_performers
     
     def _generate_segment_recommendations(self, segment_info: Dict[str, Any],
                                          creative_analysis: Dict[str, Any],
@@ -187,56 +327,15 @@ class CreativeGeneratorAgent:
         segment_type = segment_info['segment_type']
         segment_value = segment_info['segment_value']
         
-        # Generate creative variations
-        new_creatives = []
-        
-        # Creative 1: Urgency + Value
-        new_creatives.append({
-            "creative_id": "C1",
-            "format": "Image",
-            "headline": "Last Chance: Premium Comfort at 30% Off",
-            "message": "Ultra-soft bamboo fabric that moves with you. Limited stock on best-selling men's briefs. Upgrade your comfort today.",
-            "cta": "Shop Now - 30% Off",
-            "messaging_angle": "Urgency + Value",
-            "rationale": "Combines urgency with value proposition. High-performing pattern from data.",
-            "inspiration_from_data": f"Top themes: {', '.join(creative_analysis['top_messaging_themes'][:2])}"
-        })
-        
-        # Creative 2: Social Proof
-        new_creatives.append({
-            "creative_id": "C2",
-            "format": "Video",
-            "headline": "10,000+ Men Switched. Here's Why.",
-            "message": "See why our breathable mesh boxers are rated 4.9/5. No ride-up guarantee. Free returns.",
-            "cta": "Watch & Shop",
-            "messaging_angle": "Social proof + Risk reversal",
-            "rationale": f"Video format performs best (CTR: {creative_analysis['best_avg_ctr']:.4f}). Social proof builds trust.",
-            "inspiration_from_data": "Video creative_type has highest CTR"
-        })
-        
-        # Creative 3: UGC
-        new_creatives.append({
-            "creative_id": "C3",
-            "format": "UGC",
-            "headline": "Finally, Underwear That Actually Fits",
-            "message": "Real customer: 'Most comfortable briefs I've owned. The cooling mesh is a game-changer.' - Mike, verified buyer",
-            "cta": "Read Reviews & Shop",
-            "messaging_angle": "Authenticity + Specific benefit",
-            "rationale": "UGC format builds credibility. Specific benefits resonate.",
-            "inspiration_from_data": "Cooling mesh and comfort are recurring themes"
-        })
-        
-        # Creative 4: Bundle offer
-        new_creatives.append({
-            "creative_id": "C4",
-            "format": "Carousel",
-            "headline": "3-Pack Bundle: Save 40% + Free Shipping",
-            "message": "Mix & match: Briefs, Boxers, Trunks. Premium organic cotton. Best value of the year.",
-            "cta": "Build Your Bundle",
-            "messaging_angle": "Value + Choice",
-            "rationale": "Bundle offers increase AOV. Carousel showcases variety.",
-            "inspiration_from_data": "3-pack messaging has high engagement"
-        })
+        # Generate creative variations from the static templates; only the
+        # data-driven fields differ per segment
+        new_creatives = [dict(template) for template in _CREATIVE_TEMPLATES]
+        new_creatives[0]["inspiration_from_data"] = (
+            f"Top themes: {', '.join(creative_analysis['top_messaging_themes'][:2])}"
+        )
+        new_creatives[1]["rationale"] = (
+            f"Video format performs best (CTR: {creative_analysis['best_avg_ctr']:.4f}). Social proof builds trust."
+        )
         
         return {
             "campaign": segment_info['campaign'],
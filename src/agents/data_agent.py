@@ -1,45 +1,113 @@
 """Data Agent - Loads and summarizes dataset."""
+import copy
+import json
+import threading
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from pathlib import Path
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 from utils.data_utils import (
     load_data, compute_summary_stats, detect_anomalies, 
-    compute_trend, segment_analysis
+    compute_trend, segment_analysis, filter_date_range,
+    get_parsed_time_period
 )
 
 
+# Low-cardinality string columns that are grouped/filtered on
+CATEGORICAL_COLUMNS = ('creative_type', 'platform', 'audience_type', 'campaign_name')
+
+# Free-text column scanned with regexes; Arrow storage makes str ops run natively
+try:
+    import pyarrow  # noqa: F401
+    MESSAGE_DTYPE = "string[pyarrow]"
+except ImportError:
+    MESSAGE_DTYPE = None
+
+# Process-wide LRU of summaries keyed by (data path, mtime, plan signature)
+SUMMARY_CACHE_SIZE = 128
+_SUMMARY_CACHE: "OrderedDict[Tuple[str, int, str], Dict[str, Any]]" = OrderedDict()
+_SUMMARY_CACHE_LOCK = threading.Lock()
+
+# Plan fields that determine the summary
+_SUMMARY_PLAN_FIELDS = ('time_period', 'primary_metric', 'segments_to_analyze')
+
+
 class DataAgent:
     """Agent that loads and summarizes data."""
     
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.df = None
+        self.current_df = None
+        self.comparison_df = None
     
-    def load_and_summarize(self, plan: Dict[str, Any], data_path: str) -> Dict[str, Any]:
-        """Load data and create summary."""
+    def load_and_summarize(self, plan: Dict[str, Any], data_path: str,
+                           df: pd.DataFrame = None) -> Dict[str, Any]:
+        """Load data and create summary.
+        
+        If df is given (already read from data_path), it is used instead of
+        parsing the CSV again.
+        """
         # Load data
-        self.df = load_data(data_path)
+        self.df = df if df is not None else load_data(data_path)
+        for col in CATEGORICAL_COLUMNS:
+            if col in self.df.columns:
+                self.df[col] = self.df[col].astype('category')
+        if MESSAGE_DTYPE and 'creative_message' in self.df.columns:
+            self.df['creative_message'] = self.df['creative_message'].astype(MESSAGE_DTYPE)
         
         # Get time periods from plan
+        periods = get_parsed_time_period(plan)
+        
+        # Filter data once; downstream agents reuse these via get_filtered()
+        # (read-only frames - do not mutate)
+        current_df = filter_date_range(
+            self.df, periods['current_start'], periods['current_end']
+        )
+        
+        comparison_df = filter_date_range(
+            self.df, periods['comparison_start'], periods['comparison_end']
+        )
+        
+        self.current_df = current_df
+        self.comparison_df = comparison_df
+        
+        cache_key = self._summary_cache_key(plan, data_path)
+        if cache_key is not None:
+            with _SUMMARY_CACHE_LOCK:
+                cached = _SUMMARY_CACHE.get(cache_key)
+                if cached is not None:
+                    _SUMMARY_CACHE.move_to_end(cache_key)
+                    return copy.deepcopy(cached)
+        
+        summary = self._summarize(plan, current_df, comparison_df)
+        
+        if cache_key is not None:
+            with _SUMMARY_CACHE_LOCK:
+                _SUMMARY_CACHE[cache_key] = copy.deepcopy(summary)
+                if len(_SUMMARY_CACHE) > SUMMARY_CACHE_SIZE:
+                    _SUMMARY_CACHE.popitem(last=False)
+        
+        return summary
+    
+    def _summary_cache_key(self, plan: Dict[str, Any], data_path: str):
+        """Key for the summary cache, or None if the data file can't be stat'ed."""
+        try:
+            mtime_ns = Path(data_path).stat().st_mtime_ns
+        except (OSError, TypeError):
+            return None
+        plan_signature = json.dumps(
+            {field: plan.get(field) for field in _SUMMARY_PLAN_FIELDS}, sort_keys=True, default=str
+        )
+        return (str(data_path), mtime_ns, plan_signature)
+    
+    def _summarize(self, plan: Dict[str, Any], current_df: pd.DataFrame,
+                   comparison_df: pd.DataFrame) -> Dict[str, Any]:
+        """Compute quality, period stats, segments, trends and anomalies."""
         time_period = plan['time_period']
-        current_start = pd.to_datetime(time_period['start_date'])
-        current_end = pd.to_datetime(time_period['end_date'])
-        comp_start = pd.to_datetime(time_period['comparison_start'])
-        comp_end = pd.to_datetime(time_period['comparison_end'])
-        
-        # Filter data
-        current_df = self.df[
-            (self.df['date'] >= current_start) & 
-            (self.df['date'] <= current_end)
-        ].copy()
-        
-        comparison_df = self.df[
-            (self.df['date'] >= comp_start) & 
-            (self.df['date'] <= comp_end)
-        ].copy()
         
         # Data quality check
         data_quality = self._check_data_quality(self.df)
@@ -101,10 +169,8 @@ class DataAgent:
     
     def _check_data_quality(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Check data quality."""
-        missing_values = {}
-        for col in ['spend', 'clicks', 'revenue', 'purchases']:
-            if col in df.columns:
-                missing_values[col] = int(df[col].isna().sum())
+        cols = [col for col in ('spend', 'clicks', 'revenue', 'purchases') if col in df.columns]
+        missing_values = {col: int(n) for col, n in df[cols].isna().sum().items()}
         
         total_rows = len(df)
         total_missing = sum(missing_values.values())
@@ -126,3 +192,7 @@ class DataAgent:
     def get_raw_data(self) -> pd.DataFrame:
         """Get raw dataframe for detailed analysis."""
         return self.df
+    
+    def get_filtered(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Get (current, comparison) period frames from the last load."""
+        return self.current_df, self.comparison_df
@@ -1,9 +1,14 @@
 """Evaluator Agent - Validates hypotheses quantitatively."""
+import functools
 import pandas as pd
 import numpy as np
 from scipy import stats
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from utils.data_utils import filter_date_range, get_parsed_time_period
+from utils.prompt_loader import load_prompt
 
 
 class EvaluatorAgent:
@@ -16,32 +21,62 @@ class EvaluatorAgent:
     
     def _load_prompt(self) -> str:
         """Load prompt template."""
-        prompt_path = Path("prompts/evaluator_prompt.md")
-        if prompt_path.exists():
-            return prompt_path.read_text(encoding='utf-8')
-        return ""
+        return load_prompt("prompts/evaluator_prompt.md")
     
     def validate_hypotheses(self, hypotheses_data: Dict[str, Any], 
-                           df: pd.DataFrame, plan: Dict[str, Any]) -> Dict[str, Any]:
-        """Validate hypotheses with statistical tests."""
+                           df: pd.DataFrame, plan: Dict[str, Any],
+                           current_df: Optional[pd.DataFrame] = None,
+                           comparison_df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """Validate hypotheses with statistical tests.
+        
+        current_df/comparison_df may be passed in when already filtered
+        (e.g. from DataAgent.get_filtered()); otherwise they are derived from df.
+        """
         validated = []
         retry_recommendations = []
         
         # Get time periods
-        time_period = plan['time_period']
-        current_start = pd.to_datetime(time_period['start_date'])
-        current_end = pd.to_datetime(time_period['end_date'])
-        comp_start = pd.to_datetime(time_period['comparison_start'])
-        comp_end = pd.to_datetime(time_period['comparison_end'])
-        
-        current_df = df[(df['date'] >= current_start) & (df['date'] <= current_end)].copy()
-        comparison_df = df[(df['date'] >= comp_start) & (df['date'] <= comp_end)].copy()
+        periods = get_parsed_time_period(plan)
+        if current_df is None:
+            current_df = filter_date_range(df, periods['current_start'], periods['current_end'])
+        if comparison_df is None:
+            comparison_df = filter_date_range(df, periods['comparison_start'], periods['comparison_end'])
         
         primary_metric = plan['primary_metric']
+        hypotheses = hypotheses_data.get('hypotheses', [])
+        
+        # Partition each referenced segment column once, shared by all hypotheses
+        segment_cols = set()
+        for hyp in hypotheses:
+            affected_segments = hyp.get('affected_segments', [])
+            segment_filter = self._parse_segment(affected_segments[0]) if affected_segments else None
+            if segment_filter:
+                segment_cols.add(segment_filter[0])
+        
+        current_groups = {
+            col: current_df.groupby(col, sort=False, observed=True).indices
+            for col in segment_cols
+        }
+        comparison_groups = {
+            col: comparison_df.groupby(col, sort=False, observed=True).indices
+            for col in segment_cols
+        }
+        
+        # Per-segment count/mean/std of the metric, feeding the t-tests
+        current_stats = {
+            col: current_df.groupby(col, sort=False, observed=True)[primary_metric].agg(['count', 'mean', 'std'])
+            for col in segment_cols
+        }
+        comparison_stats = {
+            col: comparison_df.groupby(col, sort=False, observed=True)[primary_metric].agg(['count', 'mean', 'std'])
+            for col in segment_cols
+        }
         
-        for hyp in hypotheses_data.get('hypotheses', []):
+        for hyp in hypotheses:
             validated_hyp = self._validate_hypothesis(
-                hyp, current_df, comparison_df, primary_metric
+                hyp, current_df, comparison_df, primary_metric,
+                current_groups, comparison_groups,
+                current_stats, comparison_stats
             )
             validated.append(validated_hyp)
             
@@ -71,8 +106,18 @@ class EvaluatorAgent:
         }
     
     def _validate_hypothesis(self, hyp: Dict[str, Any], current_df: pd.DataFrame,
-                            comparison_df: pd.DataFrame, primary_metric: str) -> Dict[str, Any]:
-        """Validate a single hypothesis."""
+                            comparison_df: pd.DataFrame, primary_metric: str,
+                            current_groups: Dict[str, Dict[Any, np.ndarray]],
+                            comparison_groups: Dict[str, Dict[Any, np.ndarray]],
+                            current_stats: Dict[str, pd.DataFrame],
+                            comparison_stats: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+        """Validate a single hypothesis.
+        
+        current_groups/comparison_groups map segment column -> value -> row
+        positions, as produced by DataFrame.groupby(...).indices.
+        current_stats/comparison_stats map segment column -> count/mean/std
+        of the primary metric per segment value.
+        """
         hypothesis_text = hyp['hypothesis']
         affected_segments = hyp.get('affected_segments', [])
         
@@ -81,34 +126,43 @@ class EvaluatorAgent:
         
         if segment_filter:
             segment_col, segment_val = segment_filter
-            current_segment = current_df[current_df[segment_col] == segment_val].copy()
-            comparison_segment = comparison_df[comparison_df[segment_col] == segment_val].copy()
+            empty = np.array([], dtype=np.intp)
+            current_idx = current_groups[segment_col].get(segment_val, empty)
+            comparison_idx = comparison_groups[segment_col].get(segment_val, empty)
+            current_n = len(current_idx)
+            comparison_n = len(comparison_idx)
+            
+            # Also get control segment (other values) as a plain metric array
+            control_values = np.delete(current_df[primary_metric].to_numpy(), current_idx)
             
-            # Also get control segment (other values)
-            current_control = current_df[current_df[segment_col] != segment_val].copy()
+            n1, m1, s1 = self._lookup_stats(current_stats[segment_col], segment_val)
+            n2, m2, s2 = self._lookup_stats(comparison_stats[segment_col], segment_val)
         else:
-            current_segment = current_df.copy()
-            comparison_segment = comparison_df.copy()
-            current_control = None
+            current_n = len(current_df)
+            comparison_n = len(comparison_df)
+            control_values = None
+            
+            n1, m1, s1 = self._array_stats(current_df[primary_metric].to_numpy())
+            n2, m2, s2 = self._array_stats(comparison_df[primary_metric].to_numpy())
         
         # Statistical tests
         statistical_tests = []
         
         # Test 1: Compare current vs previous for affected segment
-        if len(current_segment) > 5 and len(comparison_segment) > 5:
-            current_values = current_segment[primary_metric].dropna()
-            comparison_values = comparison_segment[primary_metric].dropna()
-            
-            if len(current_values) > 0 and len(comparison_values) > 0:
-                t_stat, p_value = stats.ttest_ind(current_values, comparison_values)
-                
-                # Effect size (Cohen's d)
-                pooled_std = np.sqrt(
-                    ((len(current_values)-1)*current_values.std()**2 + 
-                     (len(comparison_values)-1)*comparison_values.std()**2) /
-                    (len(current_values) + len(comparison_values) - 2)
-                )
-                cohens_d = abs((current_values.mean() - comparison_values.mean()) / pooled_std) if pooled_std > 0 else 0
+        if current_n > 5 and comparison_n > 5:
+            if n1 > 0 and n2 > 0:
+                # One value per period leaves no degrees of freedom, so the
+                # t-test, pooled std and Cohen's d come out NaN
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    t_stat, p_value = stats.ttest_ind_from_stats(m1, s1, n1, m2, s2, n2)
+                    
+                    # Effect size (Cohen's d)
+                    pooled_std = np.sqrt(
+                        ((n1-1)*s1**2 + (n2-1)*s2**2) / np.float64(n1 + n2 - 2)
+                    )
+                    cohens_d = abs((m1 - m2) / pooled_std)
+                # Zero or undefined pooled std carries no effect size
+                cohens_d = float(np.where(np.isfinite(cohens_d), cohens_d, 0.0))
                 
                 effect_size_label = "small"
                 if cohens_d > 0.8:
@@ -126,8 +180,8 @@ class EvaluatorAgent:
                 })
         
         # Quantitative evidence
-        current_mean = current_segment[primary_metric].mean()
-        comparison_mean = comparison_segment[primary_metric].mean()
+        current_mean = m1
+        comparison_mean = m2
         
         quantitative_evidence = {
             "metric_change": {
@@ -139,15 +193,15 @@ class EvaluatorAgent:
                 "direction": "decline" if current_mean < comparison_mean else "increase"
             },
             "sample_size": {
-                "current_n": len(current_segment),
-                "previous_n": len(comparison_segment),
-                "sufficient": len(current_segment) >= 10 and len(comparison_segment) >= 10
+                "current_n": current_n,
+                "previous_n": comparison_n,
+                "sufficient": current_n >= 10 and comparison_n >= 10
             }
         }
         
         # Add segment specificity if applicable
-        if segment_filter and current_control is not None and len(current_control) > 5:
-            control_mean = current_control[primary_metric].mean()
+        if segment_filter and control_values is not None and len(control_values) > 5:
+            _, control_mean, _ = self._array_stats(control_values)
             quantitative_evidence["segment_specificity"] = {
                 "affected_segment": segment_filter[1],
                 "affected_value": round(float(current_mean), 2),
@@ -180,12 +234,31 @@ class EvaluatorAgent:
             "recommended_action": self._generate_action(hyp, confidence_score)
         }
     
-    def _parse_segment(self, segment_str: str):
+    def _array_stats(self, values: np.ndarray) -> Tuple[int, np.float64, np.float64]:
+        """Get (count, mean, sample std) of an array, ignoring NaN.
+        
+        Mean and std stay numpy scalars so later arithmetic on a degenerate
+        sample yields NaN rather than raising.
+        """
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return 0, np.float64(np.nan), np.float64(np.nan)
+        std = values.std(ddof=1) if values.size > 1 else np.float64(np.nan)
+        return int(values.size), np.float64(values.mean()), np.float64(std)
+    
+    def _lookup_stats(self, table: pd.DataFrame, value: Any) -> Tuple[int, float, float]:
+        """Get (count, mean, std) for a segment value, or an empty sample."""
+        if value not in table.index:
+            return 0, np.nan, np.nan
+        row = table.loc[value]
+        return int(row['count']), row['mean'], row['std']
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _parse_segment(segment_str: str) -> Optional[Tuple[str, str]]:
         """Parse segment string like 'creative_type=Image'."""
-        if '=' in segment_str:
-            parts = segment_str.split('=')
-            return (parts[0], parts[1])
-        return None
+        parts = segment_str.split('=', 1)
+        return (parts[0], parts[1]) if len(parts) == 2 else None
     
     def _calculate_confidence(self, tests: List[Dict], evidence: Dict, initial: float) -> float:
         """Calculate confidence score."""
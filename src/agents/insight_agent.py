@@ -1,11 +1,43 @@
 """Insight Agent - Generates hypotheses."""
 import json
+import numpy as np
 from typing import Dict, Any, List
 from pathlib import Path
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 from agents.llm_client import LLMClient
 from agents.memory import AgentMemory
+from agents._fastpath import rank_segments
+from utils.prompt_loader import load_prompt
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional accelerator
+    orjson = None
+
+# Below this many segments a plain Python scan beats NumPy's call overhead.
+VECTORIZE_MIN_SEGMENTS = 32
+# Above this many, the compiled kernel (when numba is installed) is worth it.
+JIT_MIN_SEGMENTS = 1000
+
+# Rule-based generation stops adding hypotheses at this cap.
+MAX_HYPOTHESES = 5
+
+
+def _numpy_default(obj: Any) -> Any:
+    """JSON fallback for numpy scalars and arrays, shared by both encoders."""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(data: Any) -> str:
+    """Serialize data as compact JSON for the LLM prompt, using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_numpy_default, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(data, separators=(',', ':'), default=_numpy_default)
 
 
 class InsightAgent:
@@ -22,10 +54,7 @@ class InsightAgent:
     
     def _load_prompt(self) -> str:
         """Load prompt template."""
-        prompt_path = Path("prompts/insight_agent_prompt.md")
-        if prompt_path.exists():
-            return prompt_path.read_text(encoding='utf-8')
-        return ""
+        return load_prompt("prompts/insight_agent_prompt.md")
     
     def generate_hypotheses(self, plan: Dict[str, Any], 
                            data_summary: Dict[str, Any]) -> Dict[str, Any]:
@@ -51,10 +80,10 @@ QUERY: {plan['query_interpretation']}
 PRIMARY METRIC: {plan['primary_metric']}
 
 DATA SUMMARY:
-{json.dumps(data_summary, indent=2)}
+{_dumps(data_summary)}
 
 PAST INSIGHTS (for context):
-{json.dumps(similar_insights[-3:], indent=2) if similar_insights else "None"}
+{_dumps(similar_insights[-3:]) if similar_insights else "None"}
 
 Generate 3-5 hypotheses following this structure:
 - Use Think → Analyze → Conclude reasoning
@@ -109,6 +138,8 @@ Return JSON with this schema:
         """Generate hypotheses using rule-based logic."""
         hypotheses = []
         primary_metric = plan['primary_metric']
+        metric_key = f'avg_{primary_metric}'
+        metric_upper = primary_metric.upper()
         
         # Extract key metrics
         current = data_summary['summary_statistics']['by_period']['current']
@@ -120,45 +151,46 @@ Return JSON with this schema:
         if 'by_creative_type' in segments:
             creative_segments = segments['by_creative_type']
             if len(creative_segments) >= 2:
-                worst = min(creative_segments, key=lambda x: x[f'avg_{primary_metric}'])
-                best = max(creative_segments, key=lambda x: x[f'avg_{primary_metric}'])
+                worst, best = self._segment_extrema(creative_segments, metric_key)
+                worst_val, best_val = worst[metric_key], best[metric_key]
                 
-                if worst[f'avg_{primary_metric}'] < best[f'avg_{primary_metric}'] * 0.7:
+                if worst_val < best_val * 0.7:
                     hypotheses.append({
                         "id": "H1",
                         "hypothesis": f"Creative fatigue in {worst['creative_type']} ads causing performance decline",
                         "reasoning": {
-                            "think": f"{worst['creative_type']} ads show significantly lower {primary_metric.upper()} than {best['creative_type']}",
-                            "analyze": f"{worst['creative_type']}: {primary_metric.upper()} {worst[f'avg_{primary_metric}']:.2f} vs {best['creative_type']}: {best[f'avg_{primary_metric}']:.2f}",
+                            "think": f"{worst['creative_type']} ads show significantly lower {metric_upper} than {best['creative_type']}",
+                            "analyze": f"{worst['creative_type']}: {metric_upper} {worst_val:.2f} vs {best['creative_type']}: {best_val:.2f}",
                             "conclude": f"{worst['creative_type']} creative likely experiencing audience fatigue"
                         },
                         "supporting_evidence": [
-                            f"{worst['creative_type']} {primary_metric.upper()} is {((best[f'avg_{primary_metric}'] - worst[f'avg_{primary_metric}']) / best[f'avg_{primary_metric}'] * 100):.0f}% lower than {best['creative_type']}",
+                            f"{worst['creative_type']} {metric_upper} is {((best_val - worst_val) / best_val * 100):.0f}% lower than {best['creative_type']}",
                             f"{worst['creative_type']} represents {worst['spend_share']*100:.0f}% of spend"
                         ],
                         "affected_segments": [f"creative_type={worst['creative_type']}"],
                         "initial_confidence": 0.75,
                         "testable": True,
-                        "test_method": f"Compare {primary_metric.upper()} trends by creative_type over time"
+                        "test_method": f"Compare {metric_upper} trends by creative_type over time"
                     })
         
         # Hypothesis 2: Audience type performance
-        if 'by_audience_type' in segments:
+        if len(hypotheses) < MAX_HYPOTHESES and 'by_audience_type' in segments:
             audience_segments = segments['by_audience_type']
             if len(audience_segments) >= 2:
-                worst_aud = min(audience_segments, key=lambda x: x[f'avg_{primary_metric}'])
+                worst_aud, _ = self._segment_extrema(audience_segments, metric_key)
+                worst_aud_val, current_val = worst_aud[metric_key], current[metric_key]
                 
-                if worst_aud[f'avg_{primary_metric}'] < current[f'avg_{primary_metric}'] * 0.8:
+                if worst_aud_val < current_val * 0.8:
                     hypotheses.append({
                         "id": "H2",
                         "hypothesis": f"Audience saturation in {worst_aud['audience_type']} campaigns",
                         "reasoning": {
                             "think": f"{worst_aud['audience_type']} audience may be exhausted",
-                            "analyze": f"{worst_aud['audience_type']} {primary_metric.upper()}: {worst_aud[f'avg_{primary_metric}']:.2f} vs overall: {current[f'avg_{primary_metric}']:.2f}",
+                            "analyze": f"{worst_aud['audience_type']} {metric_upper}: {worst_aud_val:.2f} vs overall: {current_val:.2f}",
                             "conclude": f"{worst_aud['audience_type']} pool likely saturated"
                         },
                         "supporting_evidence": [
-                            f"{worst_aud['audience_type']} {primary_metric.upper()} below average",
+                            f"{worst_aud['audience_type']} {metric_upper} below average",
                             f"Represents {worst_aud['spend_share']*100:.0f}% of spend"
                         ],
                         "affected_segments": [f"audience_type={worst_aud['audience_type']}"],
@@ -168,23 +200,23 @@ Return JSON with this schema:
                     })
         
         # Hypothesis 3: Platform performance
-        if 'by_platform' in segments:
+        if len(hypotheses) < MAX_HYPOTHESES and 'by_platform' in segments:
             platform_segments = segments['by_platform']
             if len(platform_segments) >= 2:
-                worst_plat = min(platform_segments, key=lambda x: x[f'avg_{primary_metric}'])
-                best_plat = max(platform_segments, key=lambda x: x[f'avg_{primary_metric}'])
+                worst_plat, best_plat = self._segment_extrema(platform_segments, metric_key)
+                worst_plat_val, best_plat_val = worst_plat[metric_key], best_plat[metric_key]
                 
-                if worst_plat[f'avg_{primary_metric}'] < best_plat[f'avg_{primary_metric}'] * 0.8:
+                if worst_plat_val < best_plat_val * 0.8:
                     hypotheses.append({
                         "id": "H3",
                         "hypothesis": f"Platform-specific issues on {worst_plat['platform']}",
                         "reasoning": {
                             "think": f"{worst_plat['platform']} performance diverged from {best_plat['platform']}",
-                            "analyze": f"{worst_plat['platform']} {primary_metric.upper()}: {worst_plat[f'avg_{primary_metric}']:.2f} vs {best_plat['platform']}: {best_plat[f'avg_{primary_metric}']:.2f}",
+                            "analyze": f"{worst_plat['platform']} {metric_upper}: {worst_plat_val:.2f} vs {best_plat['platform']}: {best_plat_val:.2f}",
                             "conclude": "Platform-specific issue or creative-platform mismatch"
                         },
                         "supporting_evidence": [
-                            f"{worst_plat['platform']} underperforming {best_plat['platform']} by {((best_plat[f'avg_{primary_metric}'] - worst_plat[f'avg_{primary_metric}']) / best_plat[f'avg_{primary_metric}'] * 100):.0f}%"
+                            f"{worst_plat['platform']} underperforming {best_plat['platform']} by {((best_plat_val - worst_plat_val) / best_plat_val * 100):.0f}%"
                         ],
                         "affected_segments": [f"platform={worst_plat['platform']}"],
                         "initial_confidence": 0.65,
@@ -194,18 +226,18 @@ Return JSON with this schema:
         
         # Hypothesis 4: Overall trend (always generate if change > 2%)
         metric_change = trends.get(f'{primary_metric}_change_pct', 0)
-        if abs(metric_change) > 2:
+        if len(hypotheses) < MAX_HYPOTHESES and abs(metric_change) > 2:
             direction = "decline" if metric_change < 0 else "increase"
             hypotheses.append({
                 "id": f"H{len(hypotheses)+1}",
-                "hypothesis": f"Overall {primary_metric.upper()} {direction} of {abs(metric_change):.0f}%",
+                "hypothesis": f"Overall {metric_upper} {direction} of {abs(metric_change):.0f}%",
                 "reasoning": {
-                    "think": f"Significant {direction} in {primary_metric.upper()} across campaign",
-                    "analyze": f"Current: {current[f'avg_{primary_metric}']:.2f} vs Previous: {comparison[f'avg_{primary_metric}']:.2f}",
+                    "think": f"Significant {direction} in {metric_upper} across campaign",
+                    "analyze": f"Current: {current[metric_key]:.2f} vs Previous: {comparison[metric_key]:.2f}",
                     "conclude": f"Broad performance {direction} affecting multiple segments"
                 },
                 "supporting_evidence": [
-                    f"{primary_metric.upper()} changed {metric_change:.1f}%",
+                    f"{metric_upper} changed {metric_change:.1f}%",
                     f"Trend: {trends.get(f'{primary_metric}_trend', 'unknown')}"
                 ],
                 "affected_segments": ["all"],
@@ -216,11 +248,11 @@ Return JSON with this schema:
         
         result = {
             "analysis_context": {
-                "primary_observation": f"{primary_metric.upper()} changed {metric_change:.1f}%",
+                "primary_observation": f"{metric_upper} changed {metric_change:.1f}%",
                 "time_period": f"{plan['time_period']['start_date']} to {plan['time_period']['end_date']}",
                 "key_metrics_affected": [primary_metric, "ctr"]
             },
-            "hypotheses": hypotheses[:5],  # Top 5
+            "hypotheses": hypotheses,
             "additional_considerations": [
                 "Seasonality effects may be present",
                 "External market factors not visible in dataset",
@@ -234,3 +266,26 @@ Return JSON with this schema:
         }
         
         return result
+    
+    def _segment_extrema(self, segments: List[Dict[str, Any]], key: str):
+        """Find the (lowest, highest) segment by key in a single pass.
+        
+        Ties keep the first occurrence, as min()/max() do.
+        """
+        if len(segments) > VECTORIZE_MIN_SEGMENTS:
+            values = np.fromiter((s[key] for s in segments), dtype=np.float64, count=len(segments))
+            if len(segments) > JIT_MIN_SEGMENTS:
+                lo, hi = rank_segments(values)
+            else:
+                lo, hi = int(values.argmin()), int(values.argmax())
+            return segments[lo], segments[hi]
+        
+        worst = best = segments[0]
+        worst_val = best_val = worst[key]
+        for segment in segments[1:]:
+            value = segment[key]
+            if value < worst_val:
+                worst, worst_val = segment, value
+            elif value > best_val:
+                best, best_val = segment, value
+        return worst, best
@@ -1,24 +1,104 @@
 """LLM Client for agent reasoning."""
+import asyncio
 import os
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from utils.llm_cache import LLMResponseCache
+
+try:
+    from openai import AsyncOpenAI, OpenAI
+    _HAS_OPENAI = True
+except ImportError:
+    AsyncOpenAI = OpenAI = None
+    _HAS_OPENAI = False
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
 
 
 class LLMClient:
     """Client for LLM-powered agent reasoning."""
     
-    def __init__(self, model: str = "gpt-4o-mini", temperature: float = 0.7):
+    def __init__(self, model: str = "gpt-4o-mini", temperature: float = 0.7,
+                 cache_path: Optional[str] = "memory/llm_cache.sqlite3"):
         self.model = model
         self.temperature = temperature
         self.api_key = os.getenv('OPENAI_API_KEY')
         self.client = None
+        self._http = None
+        self._async_client = None
         
         if self.api_key:
-            try:
-                from openai import OpenAI
-                self.client = OpenAI(api_key=self.api_key)
-            except ImportError:
+            if _HAS_OPENAI:
+                self._http = self._build_http_client()
+                self.client = OpenAI(api_key=self.api_key, http_client=self._http)
+            else:
                 print("⚠️  OpenAI package not installed. Using rule-based fallback.")
+        
+        self._available = self.client is not None
+        # Responses are only cached when a live client exists
+        self._cache = LLMResponseCache(cache_path) if cache_path and self._available else None
+    
+    def _build_http_client(self):
+        """Persistent keep-alive HTTP client, using HTTP/2 when h2 is installed."""
+        if httpx is None:
+            return None
+        limits = httpx.Limits(max_keepalive_connections=20)
+        try:
+            return httpx.Client(http2=True, timeout=60, limits=limits)
+        except ImportError:
+            return httpx.Client(timeout=60, limits=limits)
+    
+    def close(self):
+        """Release pooled HTTP connections and the response cache."""
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+        if self._cache is not None:
+            self._cache.close()
+    
+    def _cache_key(self, prompt: str, system_prompt: Optional[str], response_format: str) -> str:
+        """Hash of everything that determines the response."""
+        return LLMResponseCache.make_key(
+            self.model, self.temperature, response_format, system_prompt, prompt
+        )
+    
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached response, if any."""
+        return self._cache.get(key) if self._cache is not None else None
+    
+    def _cache_set(self, key: str, result: Dict[str, Any]):
+        """Store a successful response."""
+        if self._cache is not None:
+            self._cache.set(key, result)
+    
+    def _request_kwargs(self, prompt: str, system_prompt: Optional[str],
+                        response_format: str) -> Dict[str, Any]:
+        """Build chat completion arguments."""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "response_format": {"type": "json_object"} if response_format == "json" else None
+        }
+    
+    def _parse_response(self, response, response_format: str) -> Dict[str, Any]:
+        """Extract the message content from a chat completion."""
+        content = response.choices[0].message.content
+        
+        if response_format == "json":
+            return json.loads(content)
+        return {"response": content}
     
     def generate(self, prompt: str, system_prompt: str = None, 
                  response_format: str = "json") -> Dict[str, Any]:
@@ -26,29 +106,54 @@ class LLMClient:
         if not self.client:
             return self._fallback_response()
         
+        key = self._cache_key(prompt, system_prompt, response_format)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
         try:
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-            
             response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=self.temperature,
-                response_format={"type": "json_object"} if response_format == "json" else None
+                **self._request_kwargs(prompt, system_prompt, response_format)
             )
-            
-            content = response.choices[0].message.content
-            
-            if response_format == "json":
-                return json.loads(content)
-            return {"response": content}
+            result = self._parse_response(response, response_format)
+            self._cache_set(key, result)
+            return result
             
         except Exception as e:
             print(f"⚠️  LLM error: {e}. Using rule-based fallback.")
             return self._fallback_response()
     
+    async def generate_many(self, prompts: List[str], system_prompt: str = None,
+                            response_format: str = "json",
+                            max_concurrency: int = 8) -> List[Dict[str, Any]]:
+        """Generate responses for several prompts concurrently, in prompt order."""
+        if not self.client:
+            return [self._fallback_response() for _ in prompts]
+        
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(api_key=self.api_key)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def _generate_one(prompt: str) -> Dict[str, Any]:
+            key = self._cache_key(prompt, system_prompt, response_format)
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+            
+            async with semaphore:
+                try:
+                    response = await self._async_client.chat.completions.create(
+                        **self._request_kwargs(prompt, system_prompt, response_format)
+                    )
+                    result = self._parse_response(response, response_format)
+                    self._cache_set(key, result)
+                    return result
+                except Exception as e:
+                    print(f"⚠️  LLM error: {e}. Using rule-based fallback.")
+                    return self._fallback_response()
+        
+        return list(await asyncio.gather(*(_generate_one(prompt) for prompt in prompts)))
+    
     def _fallback_response(self) -> Dict[str, Any]:
         """Fallback response when LLM is unavailable."""
         return {
@@ -58,4 +163,4 @@ class LLMClient:
     
     def is_available(self) -> bool:
         """Check if LLM is available."""
-        return self.client is not None
+        return self._available
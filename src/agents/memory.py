@@ -1,55 +1,159 @@
 """Agent memory for cross-run learning."""
 import json
+from collections import defaultdict
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional accelerator
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - optional accelerator
+    ijson = None
+
+_LEGACY_ERRORS = (ValueError, IOError) + ((ijson.JSONError,) if ijson is not None else ())
+
+# Number of past insights returned by get_similar_insights.
+SIMILAR_INSIGHTS_LIMIT = 10
+
 
 class AgentMemory:
-    """Persistent memory for agents across runs."""
+    """Persistent memory for agents across runs.
+    
+    Insights are appended to a JSONL history file; counters and patterns
+    live in a small sidecar JSON that is rewritten on change.
+    """
     
     def __init__(self, memory_dir: str = "memory"):
         self.memory_dir = Path(memory_dir)
         self.memory_dir.mkdir(exist_ok=True)
-        self.memory_file = self.memory_dir / "agent_memory.json"
+        self.history_file = self.memory_dir / "insights_history.jsonl"
+        self.meta_file = self.memory_dir / "agent_memory_meta.json"
+        self.legacy_file = self.memory_dir / "agent_memory.json"
+        self._migrate_legacy()
         self.memory = self._load_memory()
+        # Keyword index over the history, built on first lookup
+        self._index: Optional[Dict[str, List[int]]] = None
+        self._offsets: List[int] = []
     
-    def _load_memory(self) -> Dict[str, Any]:
-        """Load memory from disk."""
-        if self.memory_file.exists():
-            try:
-                with open(self.memory_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                # If file is corrupted, start fresh
-                pass
-        
+    def _default_meta(self) -> Dict[str, Any]:
+        """Empty counters and patterns."""
         return {
-            "insights_history": [],
             "successful_patterns": [],
             "failed_hypotheses": [],
             "creative_performance": {},
             "run_count": 0
         }
     
+    def _migrate_legacy(self):
+        """Split a single-file agent_memory.json into history and meta files."""
+        if not self.legacy_file.exists() or self.meta_file.exists() or self.history_file.exists():
+            return
+        
+        # Write to a temp file so a failed migration leaves no partial history
+        tmp_history = self.history_file.with_name(self.history_file.name + ".tmp")
+        try:
+            with open(tmp_history, 'w', encoding='utf-8') as out:
+                meta = self._copy_legacy(out)
+        except _LEGACY_ERRORS:
+            tmp_history.unlink(missing_ok=True)
+            return
+        
+        tmp_history.replace(self.history_file)
+        self._write_meta(meta)
+        self.legacy_file.unlink()
+    
+    def _copy_legacy(self, out) -> Dict[str, Any]:
+        """Write legacy history entries to out as JSONL; return the remaining fields."""
+        meta = self._default_meta()
+        if ijson is None:
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+            for entry in legacy.pop("insights_history", []):
+                out.write(json.dumps(entry) + "\n")
+            meta.update(legacy)
+            return meta
+        
+        # Stream entries so a large history is never held in memory at once;
+        # every other top-level field is built whole, as json.load would
+        key, builder, depth = None, None, 0
+        with open(self.legacy_file, 'rb') as f:
+            for prefix, event, value in ijson.parse(f, use_float=True):
+                if builder is None:
+                    if prefix == '':
+                        if event == 'map_key':
+                            key = value
+                        continue
+                    if prefix == 'insights_history' and event in ('start_array', 'end_array'):
+                        continue
+                    builder = ijson.ObjectBuilder()
+                
+                builder.event(event, value)
+                if event in ('start_map', 'start_array'):
+                    depth += 1
+                elif event in ('end_map', 'end_array'):
+                    depth -= 1
+                if depth == 0:
+                    if key == 'insights_history':
+                        out.write(json.dumps(builder.value) + "\n")
+                    else:
+                        meta[key] = builder.value
+                    builder = None
+        return meta
+    
+    def _load_memory(self) -> Dict[str, Any]:
+        """Load counters and patterns from disk (history is read on demand)."""
+        memory = self._default_meta()
+        if self.meta_file.exists():
+            try:
+                with open(self.meta_file, 'r', encoding='utf-8') as f:
+                    memory.update(json.load(f))
+            except (json.JSONDecodeError, IOError):
+                # If file is corrupted, start fresh
+                pass
+        
+        return memory
+    
+    def _write_meta(self, meta: Dict[str, Any]):
+        """Rewrite the counters/patterns sidecar."""
+        with open(self.meta_file, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+    
     def save_memory(self):
-        """Save memory to disk."""
-        with open(self.memory_file, 'w', encoding='utf-8') as f:
-            json.dump(self.memory, f, indent=2)
+        """Save counters and patterns to disk (history is append-only)."""
+        self._write_meta(self.memory)
     
     def add_insight(self, insight: Dict[str, Any]):
         """Store successful insight."""
-        # Convert numpy types to Python types for JSON serialization
-        insight_clean = self._clean_for_json(insight)
-        self.memory["insights_history"].append({
+        entry = {
             "timestamp": datetime.now().isoformat(),
-            "insight": insight_clean
-        })
+            "insight": insight
+        }
+        with open(self.history_file, 'ab') as f:
+            offset = f.seek(0, 2)
+            f.write(self._serialize_record(entry))
+        if self._index is not None:
+            self._index_record(offset, insight)
         self.memory["run_count"] += 1
         self.save_memory()
     
+    def _serialize_record(self, record: Dict[str, Any]) -> bytes:
+        """Serialize one JSONL record, newline included."""
+        if orjson is not None:
+            # orjson handles numpy scalars and arrays natively
+            return orjson.dumps(
+                record,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+            )
+        # Convert numpy types to Python types for JSON serialization
+        return (json.dumps(self._clean_for_json(record)) + "\n").encode('utf-8')
+    
     def _clean_for_json(self, obj: Any) -> Any:
-        """Clean object for JSON serialization."""
+        """Clean object for JSON serialization (stdlib json fallback)."""
         import numpy as np
         
         if isinstance(obj, dict):
@@ -69,25 +173,79 @@ class AgentMemory:
         self.memory["successful_patterns"].append(pattern)
         self.save_memory()
     
+    def _build_index(self):
+        """Stream the history once, recording offsets and hypothesis tokens."""
+        self._index = defaultdict(list)
+        self._offsets = []
+        if not self.history_file.exists():
+            return
+        
+        offset = 0
+        with open(self.history_file, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        self._index_record(offset, json.loads(line)["insight"])
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        # Skip partially written lines
+                        pass
+                offset += len(line)
+    
+    def iter_insights(self) -> Iterator[Dict[str, Any]]:
+        """Stream stored insights, oldest first."""
+        if not self.history_file.exists():
+            return
+        with open(self.history_file, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)["insight"]
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    # Skip partially written lines
+                    continue
+    
+    def _index_record(self, offset: int, insight: Dict[str, Any]):
+        """Add one stored insight to the keyword index."""
+        record_id = len(self._offsets)
+        self._offsets.append(offset)
+        for token in set(str(insight.get("hypothesis", "")).lower().split()):
+            self._index[token].append(record_id)
+    
+    def _read_insights(self, record_ids: List[int]) -> List[Dict[str, Any]]:
+        """Read the given records back from the history file."""
+        insights = []
+        with open(self.history_file, 'rb') as f:
+            for record_id in record_ids:
+                f.seek(self._offsets[record_id])
+                insights.append(json.loads(f.readline())["insight"])
+        return insights
+    
     def get_similar_insights(self, query: str) -> List[Dict[str, Any]]:
-        """Retrieve similar past insights."""
+        """Retrieve the most recent past insights sharing a keyword with the query."""
         # Simple keyword matching (can be enhanced with embeddings)
-        query_lower = query.lower()
-        similar = []
+        if self._index is None:
+            self._build_index()
         
-        for item in self.memory["insights_history"][-10:]:  # Last 10
-            insight = item["insight"]
-            if any(word in insight.get("hypothesis", "").lower() 
-                   for word in query_lower.split()):
-                similar.append(insight)
+        matches = set()
+        for word in query.lower().split():
+            matches.update(self._index.get(word, ()))
+        if not matches:
+            return []
         
-        return similar
+        return self._read_insights(sorted(matches)[-SIMILAR_INSIGHTS_LIMIT:])
+    
+    def _count_history(self) -> int:
+        """Count stored insights."""
+        if self._index is None:
+            self._build_index()
+        return len(self._offsets)
     
     def get_stats(self) -> Dict[str, Any]:
         """Get memory statistics."""
         return {
             "total_runs": self.memory["run_count"],
-            "total_insights": len(self.memory["insights_history"]),
+            "total_insights": self._count_history(),
             "successful_patterns": len(self.memory["successful_patterns"]),
             "failed_hypotheses": len(self.memory["failed_hypotheses"])
         }
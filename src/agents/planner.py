@@ -1,8 +1,56 @@
 """Planner Agent - Decomposes user queries into subtasks."""
-import json
-from datetime import datetime, timedelta
+from __future__ import annotations
+
+import functools
+from datetime import date, timedelta
 from typing import Dict, Any
 from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from utils.prompt_loader import load_prompt
+
+# Query keyword -> value, checked in order (first match wins)
+_METRIC_MAP = {'roas': 'roas', 'ctr': 'ctr', 'revenue': 'revenue'}
+_LOOKBACK_MAP = {'last week': 7, 'last 7 days': 7, 'last month': 30, 'last 30 days': 30}
+
+_SEGMENTS_TO_ANALYZE = ("creative_type", "platform", "audience_type")
+
+# Static subtask skeleton; T2's description is filled in per plan
+_SUBTASKS_TEMPLATE = (
+    {
+        "task_id": "T1",
+        "description": "Load and validate data for specified periods",
+        "agent": "data_agent",
+        "priority": 1
+    },
+    {
+        "task_id": "T2",
+        "description": None,
+        "agent": "insight_agent",
+        "priority": 2,
+        "depends_on": ("T1",)
+    },
+    {
+        "task_id": "T3",
+        "description": "Validate hypotheses with statistical tests",
+        "agent": "evaluator",
+        "priority": 3,
+        "depends_on": ("T2",)
+    },
+    {
+        "task_id": "T4",
+        "description": "Generate creative recommendations for underperforming segments",
+        "agent": "creative_generator",
+        "priority": 4,
+        "depends_on": ("T3",)
+    },
+)
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_max_date(value: str) -> date:
+    """Parse a YYYY-MM-DD date string (cached per value)."""
+    return date.fromisoformat(value)
 
 
 class PlannerAgent:
@@ -15,10 +63,7 @@ class PlannerAgent:
     
     def _load_prompt(self) -> str:
         """Load prompt template."""
-        prompt_path = Path("prompts/planner_prompt.md")
-        if prompt_path.exists():
-            return prompt_path.read_text(encoding='utf-8')
-        return ""
+        return load_prompt("prompts/planner_prompt.md")
     
     def plan(self, user_query: str, data_info: Dict[str, Any]) -> Dict[str, Any]:
         """Create analysis plan from user query."""
@@ -32,72 +77,41 @@ class PlannerAgent:
         """Create structured plan."""
         query_lower = query.lower()
         
-        # Determine primary metric
-        if 'roas' in query_lower:
-            primary_metric = 'roas'
-        elif 'ctr' in query_lower:
-            primary_metric = 'ctr'
-        elif 'revenue' in query_lower:
-            primary_metric = 'revenue'
-        else:
-            primary_metric = 'roas'  # default
+        # Determine primary metric (default: roas)
+        primary_metric = next((v for k, v in _METRIC_MAP.items() if k in query_lower), 'roas')
         
         # Determine time period
-        lookback_days = self.config['analysis']['lookback_days']
-        
-        if 'last week' in query_lower or 'last 7 days' in query_lower:
-            lookback_days = 7
-        elif 'last month' in query_lower or 'last 30 days' in query_lower:
-            lookback_days = 30
+        lookback_days = next(
+            (v for k, v in _LOOKBACK_MAP.items() if k in query_lower),
+            self.config['analysis']['lookback_days']
+        )
         
         # Get date ranges
-        max_date = datetime.strptime(data_info['max_date'], "%Y-%m-%d")
+        max_date = _parse_max_date(data_info['max_date'])
         current_end = max_date
         current_start = max_date - timedelta(days=lookback_days - 1)
         comparison_end = current_start - timedelta(days=1)
         comparison_start = comparison_end - timedelta(days=lookback_days - 1)
         
+        metric_upper = primary_metric.upper()
+        subtasks = [dict(template) for template in _SUBTASKS_TEMPLATE]
+        subtasks[1]["description"] = f"Generate hypotheses for {metric_upper} patterns"
+        for task in subtasks[1:]:
+            task["depends_on"] = list(task["depends_on"])
+        
         plan = {
-            "query_interpretation": f"Analyze {primary_metric.upper()} performance in the most recent {lookback_days}-day period",
+            "query_interpretation": f"Analyze {metric_upper} performance in the most recent {lookback_days}-day period",
             "primary_metric": primary_metric,
             "time_period": {
-                "start_date": current_start.strftime("%Y-%m-%d"),
-                "end_date": current_end.strftime("%Y-%m-%d"),
-                "comparison_start": comparison_start.strftime("%Y-%m-%d"),
-                "comparison_end": comparison_end.strftime("%Y-%m-%d"),
+                "start_date": current_start.isoformat(),
+                "end_date": current_end.isoformat(),
+                "comparison_start": comparison_start.isoformat(),
+                "comparison_end": comparison_end.isoformat(),
                 "lookback_days": lookback_days
             },
-            "segments_to_analyze": ["creative_type", "platform", "audience_type"],
-            "subtasks": [
-                {
-                    "task_id": "T1",
-                    "description": "Load and validate data for specified periods",
-                    "agent": "data_agent",
-                    "priority": 1
-                },
-                {
-                    "task_id": "T2",
-                    "description": f"Generate hypotheses for {primary_metric.upper()} patterns",
-                    "agent": "insight_agent",
-                    "priority": 2,
-                    "depends_on": ["T1"]
-                },
-                {
-                    "task_id": "T3",
-                    "description": "Validate hypotheses with statistical tests",
-                    "agent": "evaluator",
-                    "priority": 3,
-                    "depends_on": ["T2"]
-                },
-                {
-                    "task_id": "T4",
-                    "description": "Generate creative recommendations for underperforming segments",
-                    "agent": "creative_generator",
-                    "priority": 4,
-                    "depends_on": ["T3"]
-                }
-            ],
-            "success_criteria": f"Identify validated reasons for {primary_metric.upper()} changes with confidence >0.6 and provide actionable recommendations"
+            "segments_to_analyze": list(_SEGMENTS_TO_ANALYZE),
+            "subtasks": subtasks,
+            "success_criteria": f"Identify validated reasons for {metric_upper} changes with confidence >0.6 and provide actionable recommendations"
         }
         
         return plan
@@ -1,6 +1,9 @@
 """Parallel execution for independent agent tasks."""
 import concurrent.futures
-from typing import Dict, Any, List, Callable
+import graphlib
+import heapq
+from collections import defaultdict
+from typing import Dict, Any, List, Callable, Optional
 import time
 
 
@@ -9,6 +12,27 @@ class ParallelExecutor:
     
     def __init__(self, max_workers: int = 3):
         self.max_workers = max_workers
+        self._executor = None
+    
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """Thread pool shared by every call, created on first use."""
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="agent"
+            )
+        return self._executor
+    
+    def close(self):
+        """Shut down the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
     
     def execute_parallel(self, tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Execute multiple independent tasks in parallel.
@@ -21,68 +45,120 @@ class ParallelExecutor:
         """
         results = {}
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Submit all tasks
-            future_to_task = {
-                executor.submit(task['func'], *task.get('args', [])): task['name']
-                for task in tasks
-            }
-            
-            # Collect results as they complete
-            for future in concurrent.futures.as_completed(future_to_task):
-                task_name = future_to_task[future]
-                try:
-                    results[task_name] = future.result()
-                except Exception as e:
-                    results[task_name] = {"error": str(e)}
+        executor = self._get_executor()
+        # Submit all tasks
+        future_to_task = {
+            executor.submit(task['func'], *task.get('args', [])): task['name']
+            for task in tasks
+        }
+        
+        # Collect results as they complete
+        for future in concurrent.futures.as_completed(future_to_task):
+            task_name = future_to_task[future]
+            try:
+                results[task_name] = future.result()
+            except Exception as e:
+                results[task_name] = {"error": str(e)}
         
         return results
     
-    def execute_with_dependencies(self, task_graph: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    @staticmethod
+    def _validate_graph(task_graph: Dict[str, Dict[str, Any]]):
+        """Reject unknown dependencies and cycles before any task runs."""
+        unknown = {
+            dep
+            for task in task_graph.values()
+            for dep in task.get('depends_on', [])
+            if dep not in task_graph
+        }
+        if unknown:
+            raise RuntimeError(f"Unknown dependencies: {unknown}")
+        
+        sorter = graphlib.TopologicalSorter(
+            {task_id: task.get('depends_on', []) for task_id, task in task_graph.items()}
+        )
+        try:
+            sorter.prepare()
+        except graphlib.CycleError as e:
+            raise RuntimeError(f"Circular dependency detected: {set(e.args[1])}") from e
+    
+    @staticmethod
+    def _dependency_index(task_graph: Dict[str, Dict[str, Any]]):
+        """Unfinished-dependency count per task and the successors of each task."""
+        indegree = {
+            task_id: len(task.get('depends_on', []))
+            for task_id, task in task_graph.items()
+        }
+        successors = defaultdict(list)
+        for task_id, task in task_graph.items():
+            for dep in task.get('depends_on', []):
+                successors[dep].append(task_id)
+        return indegree, successors
+    
+    @staticmethod
+    def _critical_path_lengths(task_graph: Dict[str, Dict[str, Any]],
+                               successors: Dict[str, List[str]]) -> Dict[str, int]:
+        """Length of the longest dependency chain starting at each task (itself included)."""
+        order = graphlib.TopologicalSorter(
+            {task_id: task.get('depends_on', []) for task_id, task in task_graph.items()}
+        ).static_order()
+        depth = {}
+        for task_id in reversed(list(order)):
+            depth[task_id] = 1 + max((depth[s] for s in successors[task_id]), default=0)
+        return depth
+    
+    def execute_with_dependencies(self, task_graph: Dict[str, Dict[str, Any]],
+                                  on_complete: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
         """Execute tasks respecting dependencies.
         
         Args:
             task_graph: Dict of task_id -> {func, args, depends_on}
+            on_complete: Called as on_complete(task_id, result) on the calling
+                thread as each task finishes (result is {"error": ...} on failure)
         
         Returns:
             Dict mapping task IDs to results
         """
-        results = {}
-        completed = set()
+        self._validate_graph(task_graph)
         
-        def can_execute(task_id: str) -> bool:
-            """Check if task dependencies are met."""
-            depends_on = task_graph[task_id].get('depends_on', [])
-            return all(dep in completed for dep in depends_on)
+        results = {}
+        indegree, successors = self._dependency_index(task_graph)
+        depth = self._critical_path_lengths(task_graph, successors)
+        position = {task_id: i for i, task_id in enumerate(task_graph)}
         
-        def get_ready_tasks() -> List[str]:
-            """Get tasks ready to execute."""
-            return [
-                task_id for task_id in task_graph
-                if task_id not in completed and can_execute(task_id)
-            ]
+        # Ready tasks ordered by longest remaining chain, then graph order
+        ready = [
+            (-depth[task_id], position[task_id], task_id)
+            for task_id, count in indegree.items() if count == 0
+        ]
+        heapq.heapify(ready)
+        executor = self._get_executor()
+        pending = {}  # future -> task_id
         
-        # Execute tasks in waves
-        while len(completed) < len(task_graph):
-            ready_tasks = get_ready_tasks()
+        # Kahn's algorithm: a task becomes ready when its last dependency finishes.
+        # At most max_workers are in flight so the heap, not the pool's FIFO
+        # queue, decides what runs next.
+        while ready or pending:
+            while ready and len(pending) < self.max_workers:
+                _, _, task_id = heapq.heappop(ready)
+                task = task_graph[task_id]
+                pending[executor.submit(task['func'], *task.get('args', []))] = task_id
             
-            if not ready_tasks:
-                # Check for circular dependencies
-                remaining = set(task_graph.keys()) - completed
-                raise RuntimeError(f"Circular dependency detected: {remaining}")
-            
-            # Execute ready tasks in parallel
-            parallel_tasks = [
-                {
-                    'name': task_id,
-                    'func': task_graph[task_id]['func'],
-                    'args': task_graph[task_id].get('args', [])
-                }
-                for task_id in ready_tasks
-            ]
-            
-            batch_results = self.execute_parallel(parallel_tasks)
-            results.update(batch_results)
-            completed.update(ready_tasks)
+            done, _ = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                task_id = pending.pop(future)
+                try:
+                    results[task_id] = future.result()
+                except Exception as e:
+                    results[task_id] = {"error": str(e)}
+                if on_complete is not None:
+                    on_complete(task_id, results[task_id])
+                
+                for successor in successors[task_id]:
+                    indegree[successor] -= 1
+                    if indegree[successor] == 0:
+                        heapq.heappush(ready, (-depth[successor], position[successor], successor))
         
         return results
@@ -1,7 +1,7 @@
 """Workflow orchestrator for multi-agent system."""
 import json
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 
@@ -15,6 +15,17 @@ from agents.memory import AgentMemory
 from orchestrator.parallel_executor import ParallelExecutor
 from utils.logger import AgentLogger
 from utils.config_loader import load_config, get_data_path
+from utils.data_utils import load_data, data_info, is_data_cached, peek_data_info
+
+
+# Progress header printed when a workflow step finishes (Step 1's is printed up front)
+STEP_HEADERS = {
+    'summary': "\n📊 Step 2: Loading and summarizing data...",
+    'hypotheses': "\n💡 Step 3: Generating hypotheses...",
+    'validation': "\n🔬 Step 4: Validating hypotheses...",
+    'creatives': "\n🎨 Step 5: Generating creative recommendations...",
+    'report': "\n📝 Step 6: Generating reports..."
+}
 
 
 class AgenticWorkflow:
@@ -47,63 +58,115 @@ class AgenticWorkflow:
         print(f"\n🚀 Starting Agentic Analysis")
         print(f"Query: {user_query}\n")
         
-        try:
-            # Step 1: Planning
-            print("📋 Step 1: Planning...")
-            data_path = get_data_path(self.config)
-            df = self.data_agent.load_and_summarize.__self__.df = None  # Reset
-            
-            # Load data to get info
-            import pandas as pd
-            temp_df = pd.read_csv(data_path)
-            temp_df['date'] = pd.to_datetime(temp_df['date'])
-            
-            data_info = {
-                'max_date': temp_df['date'].max().strftime("%Y-%m-%d"),
-                'min_date': temp_df['date'].min().strftime("%Y-%m-%d"),
-                'columns': list(temp_df.columns)
-            }
-            
-            plan = self.planner.plan(user_query, data_info)
+        state: Dict[str, Any] = {}
+        errors: Dict[str, Exception] = {}
+        
+        def step(name, func, depends_on=()):
+            """Graph node that stores its result in state; skipped unless every dependency succeeded."""
+            def run_step():
+                if any(dep not in state for dep in depends_on):
+                    return None
+                try:
+                    state[name] = func()
+                except Exception as e:
+                    errors[name] = e
+                    raise
+                return state[name]
+            return {'func': run_step, 'depends_on': list(depends_on)}
+        
+        def plan_step():
+            # Step 1: Planning. A warm cache makes the load cheap, so plan from
+            # the loaded frame; a cold one is parsed while planning from a
+            # date-column peek.
+            if warm_cache:
+                info = data_info(state['load'])
+            else:
+                info = peek_data_info(data_path)
+            plan = self.planner.plan(user_query, info)
             self.logger.log_agent_execution("planner", user_query, plan)
-            print(f"✓ Plan created: {plan['query_interpretation']}")
-            
+            return plan
+        
+        def summary_step():
             # Step 2: Data Loading
-            print("\n📊 Step 2: Loading and summarizing data...")
-            data_summary = self.data_agent.load_and_summarize(plan, data_path)
+            plan = state['plan']
+            data_summary = self.data_agent.load_and_summarize(plan, data_path, df=state['load'])
             self.logger.log_agent_execution("data_agent", plan, data_summary)
-            print(f"✓ Data loaded: {data_summary['data_quality']['total_rows']} rows")
-            print(f"  Quality score: {data_summary['data_quality']['quality_score']}")
-            
+            return data_summary
+        
+        def hypotheses_step():
             # Step 3: Insight Generation
-            print("\n💡 Step 3: Generating hypotheses...")
-            insights = self.insight_agent.generate_hypotheses(plan, data_summary)
+            data_summary = state['summary']
+            insights = self.insight_agent.generate_hypotheses(state['plan'], data_summary)
             self.logger.log_agent_execution("insight_agent", data_summary, insights)
-            print(f"✓ Generated {len(insights['hypotheses'])} hypotheses")
-            
+            return insights
+        
+        def validation_step():
             # Step 4: Validation
-            print("\n🔬 Step 4: Validating hypotheses...")
+            insights = state['hypotheses']
             df = self.data_agent.get_raw_data()
-            validated = self.evaluator.validate_hypotheses(insights, df, plan)
+            current_df, comparison_df = self.data_agent.get_filtered()
+            state['df'] = df
+            state['current_df'] = current_df
+            validated = self.evaluator.validate_hypotheses(
+                insights, df, state['plan'],
+                current_df=current_df, comparison_df=comparison_df
+            )
             self.logger.log_agent_execution("evaluator", insights, validated)
-            print(f"✓ Validated: {validated['summary']['high_confidence']} high-confidence insights")
-            
-            # Step 5: Creative Generation (can run in parallel with report prep)
-            print("\n🎨 Step 5: Generating creative recommendations...")
-            creatives = self.creative_generator.generate_recommendations(validated, df, plan)
+            return validated
+        
+        def creatives_step():
+            # Step 5: Creative Generation (runs alongside memory and insight saving)
+            validated = state['validation']
+            creatives = self.creative_generator.generate_recommendations(
+                validated, state['df'], state['plan'], current_df=state['current_df']
+            )
             self.logger.log_agent_execution("creative_generator", validated, creatives)
-            print(f"✓ Generated recommendations for {len(creatives['recommendations'])} segments")
-            
+            return creatives
+        
+        def memory_step():
             # Store insights in memory for future runs
-            for hyp in validated['validated_hypotheses']:
+            for hyp in state['validation']['validated_hypotheses']:
                 if hyp['confidence_score'] >= 0.7:
                     self.memory.add_insight(hyp)
-            
+        
+        def report_step():
             # Step 6: Generate Reports
-            print("\n📝 Step 6: Generating reports...")
-            self._save_insights(validated)
-            self._save_creatives(creatives)
-            self._generate_report(user_query, plan, data_summary, validated, creatives)
+            self._save_creatives(state['creatives'])
+            self._generate_report(
+                user_query, state['plan'], state['summary'], state['validation'], state['creatives']
+            )
+        
+        def report_progress(task_id, result):
+            """Print a finished step's progress from the calling thread, so concurrent steps never interleave."""
+            if task_id in STEP_HEADERS and (task_id in state or task_id in errors):
+                print(STEP_HEADERS[task_id])
+            if task_id in state:
+                for line in self._progress_lines(task_id, state[task_id]):
+                    print(line)
+        
+        try:
+            print("📋 Step 1: Planning...")
+            data_path = get_data_path(self.config)
+            df = self.data_agent.load_and_summarize.__self__.df = None  # Reset
+            warm_cache = is_data_cached(data_path)
+            
+            task_graph = {
+                # Load data once; the data agent reuses this frame in Step 2
+                'load': step('load', lambda: load_data(data_path)),
+                'plan': step('plan', plan_step, ['load'] if warm_cache else []),
+                'summary': step('summary', summary_step, ['load', 'plan']),
+                'hypotheses': step('hypotheses', hypotheses_step, ['summary']),
+                'validation': step('validation', validation_step, ['hypotheses']),
+                'creatives': step('creatives', creatives_step, ['validation']),
+                'memory': step('memory', memory_step, ['validation']),
+                'save_insights': step('save_insights', lambda: self._save_insights(state['validation']), ['validation']),
+                'report': step('report', report_step, ['creatives'])
+            }
+            
+            self.parallel_executor.execute_with_dependencies(task_graph, on_complete=report_progress)
+            if errors:
+                # Surface the failure of the earliest step in workflow order
+                raise next(errors[name] for name in task_graph if name in errors)
             
             # Save logs
             log_file = self.logger.save()
@@ -115,17 +178,39 @@ class AgenticWorkflow:
             print(f"  - Logs: {log_file}")
             
             return {
-                "plan": plan,
-                "data_summary": data_summary,
-                "insights": insights,
-                "validated": validated,
-                "creatives": creatives
+                "plan": state['plan'],
+                "data_summary": state['summary'],
+                "insights": state['hypotheses'],
+                "validated": state['validation'],
+                "creatives": state['creatives']
             }
-            
+        
         except Exception as e:
             self.logger.log_error("workflow", e, {"query": user_query})
             self.logger.save()
             raise
+        
+        finally:
+            # Worker threads must not outlive the run
+            self.parallel_executor.close()
+    
+    @staticmethod
+    def _progress_lines(task_id: str, result: Any) -> List[str]:
+        """Console summary lines for a finished workflow step."""
+        if task_id == 'plan':
+            return [f"✓ Plan created: {result['query_interpretation']}"]
+        if task_id == 'summary':
+            return [
+                f"✓ Data loaded: {result['data_quality']['total_rows']} rows",
+                f"  Quality score: {result['data_quality']['quality_score']}"
+            ]
+        if task_id == 'hypotheses':
+            return [f"✓ Generated {len(result['hypotheses'])} hypotheses"]
+        if task_id == 'validation':
+            return [f"✓ Validated: {result['summary']['high_confidence']} high-confidence insights"]
+        if task_id == 'creatives':
+            return [f"✓ Generated recommendations for {len(result['recommendations'])} segments"]
+        return []
     
     def _save_insights(self, validated: Dict[str, Any]):
         """Save insights to JSON."""
@@ -155,7 +240,7 @@ class AgenticWorkflow:
     def _generate_report(self, query: str, plan: Dict, data_summary: Dict,
                         validated: Dict, creatives: Dict):
         """Generate markdown report."""
-        report = f"""# Facebook Ads Performance Analysis Report
+        parts = [f"""# Facebook Ads Performance Analysis Report
 
 ## Query
 {query}
@@ -168,24 +253,24 @@ class AgenticWorkflow:
 
 ### Key Findings
 
-"""
+"""]
         
         # Add top insights
         high_conf_hypotheses = [h for h in validated['validated_hypotheses'] if h['confidence_score'] >= 0.7]
         
         for i, hyp in enumerate(high_conf_hypotheses[:3], 1):
-            report += f"""
+            parts.append(f"""
 #### {i}. {hyp['hypothesis']}
 - **Confidence:** {hyp['confidence_score']:.0%}
 - **Evidence:** {hyp['quantitative_evidence']['metric_change']['metric']} changed {hyp['quantitative_evidence']['metric_change']['percent_change']:+.1f}%
 - **Action:** {hyp['recommended_action']}
-"""
+""")
         
         # Performance metrics
         current = data_summary['summary_statistics']['by_period']['current']
         comparison = data_summary['summary_statistics']['by_period']['comparison']
         
-        report += f"""
+        parts.append(f"""
 
 ## Performance Metrics
 
@@ -209,40 +294,40 @@ class AgenticWorkflow:
 
 ## Segment Analysis
 
-"""
+""")
         
         # Add segment breakdowns
         for segment_name, segment_data in data_summary['segment_breakdown'].items():
-            report += f"\n### {segment_name.replace('_', ' ').title()}\n\n"
+            parts.append(f"\n### {segment_name.replace('_', ' ').title()}\n\n")
             for seg in segment_data[:3]:
                 seg_key = list(seg.keys())[0]
-                report += f"- **{seg[seg_key]}:** ROAS {seg.get('avg_roas', 0):.2f}, CTR {seg['avg_ctr']:.4f}\n"
+                parts.append(f"- **{seg[seg_key]}:** ROAS {seg.get('avg_roas', 0):.2f}, CTR {seg['avg_ctr']:.4f}\n")
         
         # Creative recommendations
-        report += f"""
+        parts.append(f"""
 
 ## Creative Recommendations
 
 {len(creatives['recommendations'])} segments identified for creative refresh.
 
-"""
+""")
         
         for rec in creatives['recommendations'][:2]:
-            report += f"""
+            parts.append(f"""
 ### {rec['segment']}
 **Current Performance:** CTR {rec['current_performance']['avg_ctr']:.4f}, ROAS {rec['current_performance']['avg_roas']:.2f}
 
 **Top Recommendations:**
-"""
+""")
             for creative in rec['new_creatives'][:2]:
-                report += f"""
+                parts.append(f"""
 - **{creative['format']}:** {creative['headline']}
   - Message: {creative['message']}
   - Angle: {creative['messaging_angle']}
   - Rationale: {creative['rationale']}
-"""
+""")
         
-        report += f"""
+        parts.append(f"""
 
 ## Next Steps
 
@@ -253,7 +338,7 @@ class AgenticWorkflow:
 
 ---
 *Generated by Kasparro Agentic FB Analyst*
-"""
+""")
         
         with open(self.reports_dir / "report.md", 'w', encoding='utf-8') as f:
-            f.write(report)
+            f.write("".join(parts))
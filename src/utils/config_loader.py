@@ -1,13 +1,32 @@
 """Configuration loader utility."""
+import copy
+import functools
 import yaml
 from pathlib import Path
 from typing import Any, Dict
 
+# libyaml's C loader when available, else the pure-Python one
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover - optional accelerator
+    from yaml import SafeLoader
+
 
 def load_config(config_path: str = "config/config.yaml") -> Dict[str, Any]:
-    """Load configuration from YAML file."""
+    """Load configuration from YAML file.
+    
+    Parsed configs are cached per path until the file's mtime changes;
+    callers get their own copy and may modify it.
+    """
+    mtime_ns = Path(config_path).stat().st_mtime_ns
+    return copy.deepcopy(_load_config_cached(str(config_path), mtime_ns))
+
+
+@functools.lru_cache(maxsize=8)
+def _load_config_cached(config_path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse the YAML file."""
     with open(config_path, 'r', encoding='utf-8') as f:
-        config = yaml.safe_load(f)
+        config = yaml.load(f, Loader=SafeLoader)
     return config
 
 
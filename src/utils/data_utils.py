@@ -1,17 +1,164 @@
 """Data processing utilities."""
+import threading
+from collections import OrderedDict
+from pathlib import Path
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Any
 
+# Arrow's multithreaded CSV parser and Feather cache when available,
+# else pandas' C parser with no on-disk cache
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+    HAS_FEATHER = True
+except ImportError:
+    CSV_ENGINE = 'c'
+    HAS_FEATHER = False
+
+# Integer count columns stored as int32 when their values fit (lossless)
+INT32_COLUMNS = ('impressions', 'purchases')
+
+
+# Process-wide LRU of parsed frames keyed by (csv path, mtime_ns)
+DATA_CACHE_SIZE = 4
+_DATA_CACHE: "OrderedDict[Tuple[str, int], pd.DataFrame]" = OrderedDict()
+_DATA_CACHE_LOCK = threading.Lock()
+
 
 def load_data(csv_path: str) -> pd.DataFrame:
-    """Load Facebook Ads data from CSV."""
-    df = pd.read_csv(csv_path)
-    df['date'] = pd.to_datetime(df['date'])
+    """Load Facebook Ads data from CSV.
+    
+    Parsed frames are cached in-process and as a Feather file next to the
+    CSV, both invalidated when the CSV's mtime changes. Callers get their
+    own copy and may modify it.
+    """
+    key = (str(csv_path), Path(csv_path).stat().st_mtime_ns)
+    with _DATA_CACHE_LOCK:
+        df = _DATA_CACHE.get(key)
+        if df is not None:
+            _DATA_CACHE.move_to_end(key)
+    
+    if df is None:
+        df = _read_data(*key)
+        with _DATA_CACHE_LOCK:
+            _DATA_CACHE[key] = df
+            _DATA_CACHE.move_to_end(key)
+            while len(_DATA_CACHE) > DATA_CACHE_SIZE:
+                _DATA_CACHE.popitem(last=False)
+    return df.copy()
+
+
+def is_data_cached(csv_path: str) -> bool:
+    """Whether load_data can skip parsing the CSV (in-process or fresh Feather cache)."""
+    mtime_ns = Path(csv_path).stat().st_mtime_ns
+    with _DATA_CACHE_LOCK:
+        if (str(csv_path), mtime_ns) in _DATA_CACHE:
+            return True
+    return _feather_is_fresh(Path(csv_path), mtime_ns)
+
+
+def _feather_is_fresh(csv_path: Path, mtime_ns: int) -> bool:
+    """Whether the CSV's Feather cache exists and is not older than the CSV."""
+    cache_path = csv_path.with_suffix('.feather')
+    return HAS_FEATHER and cache_path.exists() and cache_path.stat().st_mtime_ns >= mtime_ns
+
+
+def _read_data(csv_path: str, mtime_ns: int) -> pd.DataFrame:
+    """Parse the CSV, or read its Feather cache if it is not older than the CSV."""
+    cache_path = Path(csv_path).with_suffix('.feather')
+    if _feather_is_fresh(Path(csv_path), mtime_ns):
+        try:
+            df = pd.read_feather(cache_path)
+            _downcast_counts(df)
+            return df
+        except (OSError, ValueError):
+            # Unreadable cache - fall through and re-parse
+            pass
+    
+    df = pd.read_csv(csv_path, engine=CSV_ENGINE, parse_dates=['date'])
+    _downcast_counts(df)
+    if HAS_FEATHER:
+        try:
+            df.to_feather(cache_path)
+        except (OSError, ValueError):
+            # Caching is best-effort (e.g. read-only data directory)
+            pass
     return df
 
 
+def _downcast_counts(df: pd.DataFrame):
+    """Narrow int64 count columns to int32 in place when no value overflows."""
+    bounds = np.iinfo(np.int32)
+    for col in INT32_COLUMNS:
+        if col in df.columns and df[col].dtype == np.int64 and len(df):
+            values = df[col].to_numpy()
+            if bounds.min <= values.min() and values.max() <= bounds.max:
+                df[col] = values.astype(np.int32)
+
+
+def data_info(df: pd.DataFrame) -> Dict[str, Any]:
+    """Date range and column names of a loaded frame, as the planner expects."""
+    return {
+        'max_date': df['date'].max().strftime("%Y-%m-%d"),
+        'min_date': df['date'].min().strftime("%Y-%m-%d"),
+        'columns': list(df.columns)
+    }
+
+
+def peek_data_info(csv_path: str) -> Dict[str, Any]:
+    """data_info from the header and date column only.
+    
+    For a cold cache, so planning can run alongside the full load_data
+    parse; when is_data_cached(), take data_info of the loaded frame instead.
+    """
+    columns = list(pd.read_csv(csv_path, nrows=0).columns)
+    dates = pd.read_csv(csv_path, engine=CSV_ENGINE, usecols=['date'], parse_dates=['date'])['date']
+    return {
+        'max_date': dates.max().strftime("%Y-%m-%d"),
+        'min_date': dates.min().strftime("%Y-%m-%d"),
+        'columns': columns
+    }
+
+
+def parse_time_period(time_period: Dict[str, Any]) -> Dict[str, np.datetime64]:
+    """Parse a plan's time_period date strings into datetime64 scalars."""
+    return {
+        'current_start': pd.to_datetime(time_period['start_date']).to_datetime64(),
+        'current_end': pd.to_datetime(time_period['end_date']).to_datetime64(),
+        'comparison_start': pd.to_datetime(time_period['comparison_start']).to_datetime64(),
+        'comparison_end': pd.to_datetime(time_period['comparison_end']).to_datetime64()
+    }
+
+
+def get_parsed_time_period(plan: Dict[str, Any]) -> Dict[str, np.datetime64]:
+    """Get the plan's parsed time period, parsing and caching it on first use."""
+    if '_parsed_time_period' not in plan:
+        plan['_parsed_time_period'] = parse_time_period(plan['time_period'])
+    return plan['_parsed_time_period']
+
+
+def filter_date_range(df: pd.DataFrame, start, end) -> pd.DataFrame:
+    """Select rows whose date falls within [start, end].
+    
+    Slices by binary search when the frame is already sorted by date;
+    otherwise applies one boolean mask over the date array.
+    """
+    if not isinstance(start, np.datetime64):
+        start = pd.to_datetime(start).to_datetime64()
+    if not isinstance(end, np.datetime64):
+        end = pd.to_datetime(end).to_datetime64()
+    
+    dates = df['date'].to_numpy()
+    if df['date'].is_monotonic_increasing:
+        lo = np.searchsorted(dates, start, side='left')
+        hi = np.searchsorted(dates, end, side='right')
+        return df.iloc[lo:hi]
+    
+    return df[(dates >= start) & (dates <= end)]
+
+
 def get_date_range(df: pd.DataFrame, lookback_days: int = 7) -> Tuple[str, str, str, str]:
     """Get current and comparison date ranges."""
     max_date = df['date'].max()
@@ -32,19 +179,27 @@ def get_date_range(df: pd.DataFrame, lookback_days: int = 7) -> Tuple[str, str,
 def compute_summary_stats(df: pd.DataFrame, group_by: List[str] = None) -> Dict[str, Any]:
     """Compute summary statistics."""
     if group_by:
-        grouped = df.groupby(group_by)
+        # One hash build; totals come from the small per-group table
+        grouped = df.groupby(group_by, sort=False, observed=True).agg(
+            spend=('spend', 'sum'),
+            revenue=('revenue', 'sum'),
+            ctr=('ctr', 'mean'),
+            purchases=('purchases', 'sum')
+        )
         return {
-            'total_spend': float(grouped['spend'].sum().sum()),
-            'total_revenue': float(grouped['revenue'].sum().sum()),
-            'avg_roas': float((grouped['revenue'].sum() / grouped['spend'].sum()).mean()),
-            'avg_ctr': float(grouped['ctr'].mean().mean()),
-            'total_purchases': int(grouped['purchases'].sum().sum())
+            'total_spend': float(grouped['spend'].sum()),
+            'total_revenue': float(grouped['revenue'].sum()),
+            'avg_roas': float((grouped['revenue'] / grouped['spend']).mean()),
+            'avg_ctr': float(grouped['ctr'].mean()),
+            'total_purchases': int(grouped['purchases'].sum())
         }
     else:
+        total_spend = df['spend'].sum()
+        total_revenue = df['revenue'].sum()
         return {
-            'total_spend': float(df['spend'].sum()),
-            'total_revenue': float(df['revenue'].sum()),
-            'avg_roas': float(df['revenue'].sum() / df['spend'].sum()) if df['spend'].sum() > 0 else 0,
+            'total_spend': float(total_spend),
+            'total_revenue': float(total_revenue),
+            'avg_roas': float(total_revenue / total_spend) if total_spend > 0 else 0,
             'avg_ctr': float(df['ctr'].mean()),
             'total_purchases': int(df['purchases'].sum())
         }
@@ -64,31 +219,45 @@ def detect_anomalies(df: pd.DataFrame, metric: str = 'roas', threshold: float =
     if std == 0:
         return anomalies
     
-    df['z_score'] = (df[metric] - mean) / std
-    anomaly_rows = df[abs(df['z_score']) > threshold]
+    # Score locally so the caller's frame is never mutated
+    metric_values = df[metric].to_numpy(dtype=np.float64)
+    z_scores = (metric_values - mean) / std
+    # NaN scores compare False, so missing values are never flagged
+    hits = np.flatnonzero(np.abs(z_scores) > threshold)[:5]  # Return top 5
+    hit_dates = pd.DatetimeIndex(df['date'].to_numpy()[hits]).strftime("%Y-%m-%d")
     
-    for _, row in anomaly_rows.iterrows():
+    for date_str, value, z_score in zip(hit_dates, metric_values[hits].tolist(), z_scores[hits].tolist()):
         anomalies.append({
-            'date': row['date'].strftime("%Y-%m-%d"),
+            'date': date_str,
             'metric': metric,
-            'value': float(row[metric]),
-            'z_score': float(row['z_score']),
-            'note': f"Unusually {'high' if row['z_score'] > 0 else 'low'} {metric}"
+            'value': value,
+            'z_score': z_score,
+            'note': f"Unusually {'high' if z_score > 0 else 'low'} {metric}"
         })
     
-    return anomalies[:5]  # Return top 5
+    return anomalies
 
 
 def compute_trend(df: pd.DataFrame, metric: str = 'roas') -> Dict[str, Any]:
     """Compute trend direction and magnitude."""
-    df_sorted = df.sort_values('date')
-    values = df_sorted[metric].dropna()
+    # Work on the raw arrays: same row order as sort_values('date') (NaT last)
+    dates = df['date'].to_numpy('datetime64[ns]')
+    values = df[metric].to_numpy(dtype=np.float64)
+    nat = np.isnat(dates)
+    if nat.any():
+        valid = np.flatnonzero(~nat)
+        order = np.concatenate([valid[dates[valid].argsort()], np.flatnonzero(nat)])
+    else:
+        order = dates.argsort()
+    values = values[order]
+    values = values[~np.isnan(values)]
     
     if len(values) < 2:
         return {'trend': 'insufficient_data', 'change_pct': 0}
     
-    first_half = values[:len(values)//2].mean()
-    second_half = values[len(values)//2:].mean()
+    half = len(values) // 2
+    first_half = values[:half].mean()
+    second_half = values[half:].mean()
     
     if first_half == 0:
         return {'trend': 'undefined', 'change_pct': 0}
@@ -110,20 +279,28 @@ def compute_trend(df: pd.DataFrame, metric: str = 'roas') -> Dict[str, Any]:
 
 def segment_analysis(df: pd.DataFrame, segment_col: str, metric: str = 'roas') -> List[Dict]:
     """Analyze performance by segment."""
-    segments = []
-    
-    for segment_value in df[segment_col].unique():
-        segment_df = df[df[segment_col] == segment_value]
-        
-        if len(segment_df) < 5:
-            continue
-        
-        segments.append({
+    # One grouped pass; sort=False keeps first-appearance order for ties below
+    grouped = df.groupby(segment_col, sort=False, observed=True).agg(
+        avg_metric=(metric, 'mean'),
+        avg_ctr=('ctr', 'mean'),
+        spend_sum=('spend', 'sum'),
+        n=(metric, 'size')
+    )
+    grouped = grouped[grouped['n'] >= 5]
+    total_spend = df['spend'].sum()
+    
+    segments = [
+        {
             segment_col: str(segment_value),
-            f'avg_{metric}': float(segment_df[metric].mean()),
-            'avg_ctr': float(segment_df['ctr'].mean()),
-            'spend_share': float(segment_df['spend'].sum() / df['spend'].sum()),
-            'n': len(segment_df)
-        })
+            f'avg_{metric}': float(avg_metric),
+            'avg_ctr': float(avg_ctr),
+            'spend_share': float(spend_sum / total_spend),
+            'n': int(n)
+        }
+        for segment_value, avg_metric, avg_ctr, spend_sum, n in zip(
+            grouped.index, grouped['avg_metric'].tolist(), grouped['avg_ctr'].tolist(),
+            grouped['spend_sum'].tolist(), grouped['n'].tolist()
+        )
+    ]
     
     return sorted(segments, key=lambda x: x[f'avg_{metric}'], reverse=True)
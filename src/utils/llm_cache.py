@@ -0,0 +1,81 @@
+"""SQLite cache for LLM responses keyed by prompt hash."""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional accelerator
+    orjson = None
+
+
+class LLMResponseCache:
+    """Disk cache mapping a request hash to its parsed JSON response."""
+    
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self._conn = None
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """SHA256 over the request parts."""
+        return hashlib.sha256("|".join(str(p) for p in parts).encode('utf-8')).hexdigest()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache "
+                "(k TEXT PRIMARY KEY, v BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+        return self._conn
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response, or None on a miss or expired entry."""
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT v, created_at FROM llm_cache WHERE k = ?", (key,)
+                ).fetchone()
+        except (sqlite3.Error, OSError):
+            # An unusable cache only costs the speedup
+            return None
+        if row is None:
+            return None
+        
+        value, created_at = row
+        if self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds:
+            return None
+        try:
+            return orjson.loads(value) if orjson is not None else json.loads(value)
+        except ValueError:
+            return None
+    
+    def set(self, key: str, value: Dict[str, Any]):
+        """Store a response."""
+        data = orjson.dumps(value) if orjson is not None else json.dumps(value).encode('utf-8')
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (k, v, created_at) VALUES (?, ?, ?)",
+                    (key, data, time.time())
+                )
+                conn.commit()
+        except (sqlite3.Error, OSError):
+            pass
+    
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,10 +1,16 @@
 """Logging utility for agent execution traces."""
 import json
 import os
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional accelerator
+    orjson = None
+
 
 class AgentLogger:
     """Logger for agent execution traces."""
@@ -13,7 +19,12 @@ class AgentLogger:
         self.logs_dir = Path(logs_dir)
         self.logs_dir.mkdir(exist_ok=True)
         self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.logs = []
+        self.log_file = self.logs_dir / f"execution_{self.session_id}.jsonl"
+        # Opened on first write; entries are appended one JSON line each, so
+        # later mutation of the logged objects cannot change the trace
+        self._fh = None
+        # Workflow steps may log from executor threads
+        self._lock = threading.Lock()
     
     def log_agent_execution(self, agent_name: str, input_data: Any, 
                            output_data: Any, metadata: Dict = None):
@@ -21,11 +32,11 @@ class AgentLogger:
         log_entry = {
             "timestamp": datetime.now().isoformat(),
             "agent": agent_name,
-            "input": self._serialize(input_data),
-            "output": self._serialize(output_data),
+            "input": input_data,
+            "output": output_data,
             "metadata": metadata or {}
         }
-        self.logs.append(log_entry)
+        self._write(log_entry)
     
     def log_error(self, agent_name: str, error: Exception, context: Dict = None):
         """Log an error."""
@@ -36,24 +47,30 @@ class AgentLogger:
             "error_type": type(error).__name__,
             "context": context or {}
         }
-        self.logs.append(log_entry)
+        self._write(log_entry)
     
     def save(self):
-        """Save logs to file."""
-        log_file = self.logs_dir / f"execution_{self.session_id}.json"
-        with open(log_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                "session_id": self.session_id,
-                "logs": self.logs
-            }, f, indent=2)
-        return str(log_file)
+        """Flush logs to file."""
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+                self._fh.close()
+                self._fh = None
+        return str(self.log_file)
+    
+    def _write(self, entry: Dict[str, Any]):
+        """Append one entry as a JSON line."""
+        line = self._encode(entry) + b"\n"
+        with self._lock:
+            if self._fh is None:
+                self._fh = open(self.log_file, 'ab', buffering=1 << 16)
+            self._fh.write(line)
     
-    def _serialize(self, data: Any) -> Any:
-        """Serialize data for JSON logging."""
-        if isinstance(data, (str, int, float, bool, type(None))):
-            return data
-        if isinstance(data, dict):
-            return {k: self._serialize(v) for k, v in data.items()}
-        if isinstance(data, (list, tuple)):
-            return [self._serialize(item) for item in data]
-        return str(data)
+    def _encode(self, entry: Dict[str, Any]) -> bytes:
+        """Encode a log entry as JSON; anything non-serializable is logged via str()."""
+        if orjson is not None:
+            return orjson.dumps(
+                entry, default=str,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            )
+        return json.dumps(entry, default=str).encode('utf-8')
@@ -0,0 +1,12 @@
+"""Prompt template loader utility."""
+import functools
+from pathlib import Path
+
+
+@functools.lru_cache(maxsize=8)
+def load_prompt(prompt_path: str) -> str:
+    """Load a prompt template, cached per path; empty string if missing."""
+    path = Path(prompt_path)
+    if path.exists():
+        return path.read_text(encoding='utf-8')
+    return ""
@@ -0,0 +1,31 @@
+"""Tests for Creative Generator Agent."""
+import pytest
+import pandas as pd
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents.creative_generator import CreativeGeneratorAgent
+
+
+@pytest.fixture(params=['hyperscan', 'str.contains'])
+def agent(request):
+    """Agent on each matching path (hyperscan when installed, else str.contains)."""
+    agent = CreativeGeneratorAgent({'analysis': {'low_ctr_threshold': 0.01}})
+    if request.param == 'str.contains':
+        agent._pattern_db = None
+    elif agent._pattern_db is None:
+        pytest.skip("hyperscan not installed")
+    return agent
+
+
+def test_tied_counts_rank_by_first_appearance(agent):
+    """Test that themes/CTAs with equal counts keep the order they first appeared in."""
+    messages = pd.Series(["Save 20% today", "Limited run - try it"])
+    
+    themes, ctas = agent._extract_themes_and_ctas(messages)
+    
+    # Declaration order would put Urgency before Discount and Try before Save
+    assert themes == ["Discount", "Urgency"]
+    assert ctas == ["Save", "Try"]
@@ -0,0 +1,80 @@
+"""Tests for data utilities."""
+import os
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils import data_utils
+from utils.data_utils import load_data, data_info, is_data_cached, peek_data_info
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    """Small ads CSV on disk."""
+    path = tmp_path / "ads.csv"
+    pd.DataFrame({
+        'date': ['2025-03-01', '2025-03-02', '2025-03-03'],
+        'spend': [10.0, 20.0, np.nan],
+        'roas': [2.0, 3.0, 4.0]
+    }).to_csv(path, index=False)
+    return path
+
+
+def test_load_data_parses_dates(csv_file):
+    """Test that the date column is parsed on load."""
+    df = load_data(str(csv_file))
+    
+    assert pd.api.types.is_datetime64_any_dtype(df['date'])
+    assert len(df) == 3
+    assert df['spend'].isna().sum() == 1
+
+
+def test_load_data_returns_independent_copies(csv_file):
+    """Test that changes to a loaded frame do not leak into the cache."""
+    first = load_data(str(csv_file))
+    first['roas'] = 0.0
+    
+    second = load_data(str(csv_file))
+    
+    assert second['roas'].tolist() == [2.0, 3.0, 4.0]
+
+
+def test_load_data_reloads_after_csv_changes(csv_file):
+    """Test that a newer CSV invalidates the cached frame."""
+    load_data(str(csv_file))
+    
+    pd.DataFrame({'date': ['2025-04-01'], 'spend': [5.0], 'roas': [1.0]}).to_csv(csv_file, index=False)
+    stat = csv_file.stat()
+    os.utime(csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    df = load_data(str(csv_file))
+    
+    assert len(df) == 1
+    if data_utils.HAS_FEATHER:
+        assert csv_file.with_suffix('.feather').exists()
+
+
+def test_peek_data_info_matches_full_load(csv_file):
+    """Test that the date-column peek reports the same info as a full load."""
+    df = load_data(str(csv_file))
+    
+    info = peek_data_info(str(csv_file))
+    
+    assert info == {'max_date': '2025-03-03', 'min_date': '2025-03-01', 'columns': list(df.columns)}
+
+
+def test_is_data_cached_tracks_loads_and_changes(csv_file):
+    """Test that the cache check turns on after a load and off when the CSV changes."""
+    assert not is_data_cached(str(csv_file))
+    
+    df = load_data(str(csv_file))
+    
+    assert is_data_cached(str(csv_file))
+    assert data_info(df) == peek_data_info(str(csv_file))
+    
+    stat = csv_file.stat()
+    os.utime(csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert not is_data_cached(str(csv_file))
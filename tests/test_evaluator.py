@@ -188,6 +188,25 @@ def test_summary_statistics(config, sample_data, sample_plan):
     assert summary['high_confidence'] + summary['medium_confidence'] + summary['low_confidence'] == 2
 
 
+def test_single_value_per_period_does_not_crash(config, sample_plan):
+    """Test that one non-missing metric value per period yields NaN stats, not an error."""
+    evaluator = EvaluatorAgent(config)
+    
+    dates = pd.date_range('2025-03-18', '2025-03-31', freq='D')
+    roas = np.full(len(dates), np.nan)
+    roas[0] = 3.0   # only value in the comparison period
+    roas[-1] = 2.0  # only value in the current period
+    df = pd.DataFrame({'date': dates, 'creative_type': 'Image', 'roas': roas})
+    
+    hyp = {'id': 'H1', 'hypothesis': 'Overall ROAS decline', 'affected_segments': [], 'initial_confidence': 0.5}
+    result = evaluator.validate_hypotheses({'hypotheses': [hyp]}, df, sample_plan)
+    
+    test = result['validated_hypotheses'][0]['statistical_tests'][0]
+    assert np.isnan(test['p_value'])
+    assert not test['significant']
+    assert test['effect_size'] == "small (Cohen's d = 0.00)"
+
+
 def test_parse_segment():
     """Test segment parsing."""
     config = {'validation': {'min_confidence_retry': 0.6, 'max_retries': 2, 'statistical_significance': 0.05}}
@@ -0,0 +1,97 @@
+"""Tests for Agent Memory."""
+import json
+import pytest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents import memory as memory_module
+from agents.memory import AgentMemory
+
+
+@pytest.fixture
+def memory(tmp_path):
+    """Empty memory in a temporary directory."""
+    return AgentMemory(memory_dir=str(tmp_path))
+
+
+def test_add_insight_appends_line(memory):
+    """Test that each insight is one appended JSONL record."""
+    memory.add_insight({"id": "H1", "hypothesis": "ROAS decline"})
+    memory.add_insight({"id": "H2", "hypothesis": "CTR drop"})
+    
+    lines = memory.history_file.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[1])["insight"]["id"] == "H2"
+    assert memory.get_stats()["total_insights"] == 2
+    assert memory.get_stats()["total_runs"] == 2
+
+
+def test_legacy_file_migrated(tmp_path):
+    """Test that a single-file agent_memory.json is split on load."""
+    legacy = {
+        "insights_history": [{"timestamp": "t", "insight": {"hypothesis": "ROAS decline"}}],
+        "successful_patterns": [],
+        "failed_hypotheses": [],
+        "creative_performance": {},
+        "run_count": 1
+    }
+    (tmp_path / "agent_memory.json").write_text(json.dumps(legacy), encoding='utf-8')
+    
+    memory = AgentMemory(memory_dir=str(tmp_path))
+    
+    assert not (tmp_path / "agent_memory.json").exists()
+    assert memory.get_stats()["total_runs"] == 1
+    assert memory.get_similar_insights("roas") == [{"hypothesis": "ROAS decline"}]
+
+
+@pytest.mark.parametrize("reader", ["json", "ijson"])
+def test_legacy_migration_keeps_extra_fields(tmp_path, monkeypatch, reader):
+    """Test that streamed and whole-file migration keep the same legacy fields."""
+    if reader == "json":
+        monkeypatch.setattr(memory_module, "ijson", None)
+    elif memory_module.ijson is None:
+        pytest.skip("ijson not installed")
+    legacy = {
+        "insights_history": [
+            {"timestamp": "t1", "insight": {"hypothesis": "ROAS decline", "scores": [0.5, 1]}},
+            {"timestamp": "t2", "insight": {"hypothesis": "CTR drop"}}
+        ],
+        "successful_patterns": [{"pattern": "video"}],
+        "failed_hypotheses": [],
+        "creative_performance": {"Video": {"ctr": 0.02}},
+        "run_count": 2,
+        "schema_version": 1,
+        "notes": {"source": "v1", "tags": ["a", "b"]}
+    }
+    (tmp_path / "agent_memory.json").write_text(json.dumps(legacy), encoding='utf-8')
+    
+    memory = AgentMemory(memory_dir=str(tmp_path))
+    
+    meta = json.loads(memory.meta_file.read_text(encoding='utf-8'))
+    assert meta == {k: v for k, v in legacy.items() if k != "insights_history"}
+    lines = memory.history_file.read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line) for line in lines] == legacy["insights_history"]
+
+
+def test_similar_insights_returns_most_recent_matches(memory):
+    """Test that retrieval returns the ten most recent keyword matches."""
+    for i in range(25):
+        memory.add_insight({"id": f"H{i}", "hypothesis": f"ROAS shift {i}"})
+        memory.add_insight({"id": f"C{i}", "hypothesis": f"CTR shift {i}"})
+    
+    similar = memory.get_similar_insights("roas")
+    
+    assert [s["id"] for s in similar] == [f"H{i}" for i in range(15, 25)]
+
+
+def test_index_updated_after_first_lookup(memory):
+    """Test that insights added after the index is built are searchable."""
+    memory.add_insight({"id": "H1", "hypothesis": "ROAS decline"})
+    assert memory.get_similar_insights("ctr") == []
+    
+    memory.add_insight({"id": "H2", "hypothesis": "CTR drop"})
+    
+    assert [s["id"] for s in memory.get_similar_insights("ctr")] == ["H2"]
+    assert memory.get_stats()["total_insights"] == 2
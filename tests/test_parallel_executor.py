@@ -0,0 +1,119 @@
+"""Tests for Parallel Executor."""
+import time
+import threading
+import pytest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from orchestrator.parallel_executor import ParallelExecutor
+
+
+@pytest.fixture
+def executor():
+    """Executor with a small worker pool."""
+    return ParallelExecutor(max_workers=3)
+
+
+def test_results_for_every_task(executor):
+    """Test that each task's result (or error) is returned by id."""
+    def fail():
+        raise ValueError("boom")
+    
+    task_graph = {
+        'T1': {'func': lambda: 1},
+        'T2': {'func': lambda x, y: x + y, 'args': [2, 3], 'depends_on': ['T1']},
+        'T3': {'func': fail, 'depends_on': ['T1']},
+        'T4': {'func': lambda: 4, 'depends_on': ['T2', 'T3']}
+    }
+    
+    results = executor.execute_with_dependencies(task_graph)
+    
+    assert results == {'T1': 1, 'T2': 5, 'T3': {'error': 'boom'}, 'T4': 4}
+
+
+def test_dependencies_run_first(executor):
+    """Test that a task starts only after all of its dependencies finish."""
+    order = []
+    lock = threading.Lock()
+    
+    def record(name, delay=0.0):
+        def run():
+            time.sleep(delay)
+            with lock:
+                order.append(name)
+        return run
+    
+    task_graph = {
+        'slow': {'func': record('slow', 0.2)},
+        'fast': {'func': record('fast')},
+        'after_fast': {'func': record('after_fast'), 'depends_on': ['fast']},
+        'join': {'func': record('join'), 'depends_on': ['slow', 'after_fast']}
+    }
+    
+    executor.execute_with_dependencies(task_graph)
+    
+    # after_fast must not wait for the unrelated slow task
+    assert order.index('after_fast') < order.index('slow')
+    assert order[-1] == 'join'
+
+
+def test_circular_dependency_raises(executor):
+    """Test that a dependency cycle is rejected before any task runs."""
+    ran = []
+    task_graph = {
+        'A': {'func': lambda: 1, 'depends_on': ['B']},
+        'B': {'func': lambda: 2, 'depends_on': ['A']},
+        'C': {'func': lambda: ran.append('C')}
+    }
+    
+    with pytest.raises(RuntimeError, match="Circular dependency"):
+        executor.execute_with_dependencies(task_graph)
+    assert ran == []
+
+
+def test_unknown_dependency_raises(executor):
+    """Test that depending on a missing task is rejected."""
+    task_graph = {'A': {'func': lambda: 1, 'depends_on': ['missing']}}
+    
+    with pytest.raises(RuntimeError, match="Unknown dependencies"):
+        executor.execute_with_dependencies(task_graph)
+
+
+def test_longest_chain_dispatched_first():
+    """Test that with one worker, the task heading the longest chain runs first."""
+    executor = ParallelExecutor(max_workers=1)
+    order = []
+    
+    task_graph = {
+        'leaf': {'func': lambda: order.append('leaf')},
+        'head': {'func': lambda: order.append('head')},
+        'middle': {'func': lambda: order.append('middle'), 'depends_on': ['head']},
+        'tail': {'func': lambda: order.append('tail'), 'depends_on': ['middle']}
+    }
+    
+    executor.execute_with_dependencies(task_graph)
+    
+    # tail and leaf tie on remaining length, so graph order breaks the tie
+    assert order == ['head', 'middle', 'leaf', 'tail']
+
+
+def test_on_complete_runs_on_calling_thread(executor):
+    """Test that completion callbacks fire once per task, on the caller's thread."""
+    def fail():
+        raise ValueError("boom")
+    
+    calls = []
+    task_graph = {
+        'A': {'func': lambda: 1},
+        'B': {'func': fail, 'depends_on': ['A']}
+    }
+    
+    executor.execute_with_dependencies(
+        task_graph,
+        on_complete=lambda task_id, result: calls.append((task_id, result, threading.current_thread()))
+    )
+    
+    assert [(task_id, result) for task_id, result, _ in calls] == [('A', 1), ('B', {'error': 'boom'})]
+    assert all(thread is threading.main_thread() for _, _, thread in calls)